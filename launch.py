@@ -2,32 +2,111 @@
 Sistema de Automatización Documental con IA
 Script de inicio para el dashboard y API
 """
+import concurrent.futures
+import importlib.util
 import os
 import sys
-import subprocess
-import time
-import threading
-import webbrowser
-from pathlib import Path
+from functools import lru_cache
+from typing import Optional
+
+# Archivos candidatos para cada componente, en orden de preferencia
+_CANDIDATE_FILES = {
+    'dashboard': (
+        'src/dashboard/app.py',
+        'enhanced_dashboard.py',
+        'dashboard.py', 
+        'main_dashboard.py',
+        'app.py'
+    ),
+    'api': (
+        'src/api/main.py',
+        'api/main.py',
+        'main_api.py',
+        'api.py'
+    )
+}
+
+# Contenido por defecto del archivo .env (codificado una sola vez)
+_ENV_BYTES = """# Configuración Sistema Automatización IA
+
+# Configuración Web
+DASHBOARD_HOST=127.0.0.1
+DASHBOARD_PORT=8501
+API_HOST=127.0.0.1
+API_PORT=8000
+
+# Configuración IA
+USE_OLLAMA=true
+OLLAMA_BASE_URL=http://localhost:11434
+DEFAULT_MODEL=llama3.1
+OPENAI_API_KEY=sk-opcional-para-gpt
+
+# Archivos
+UPLOAD_DIR=uploads
+MAX_FILE_SIZE=10485760
+
+# Sistema
+ENVIRONMENT=development
+DEBUG=true
+LOG_LEVEL=INFO
+
+# Dashboard
+PROJECT_NAME=Sistema de Automatización IA
+VERSION=1.0.0
+DESCRIPTION=Sistema de automatización documental con inteligencia artificial
+""".encode("utf-8")
+
+# Textos fijos de la consola, codificados una sola vez
+_STDOUT_ENCODING = getattr(sys.stdout, 'encoding', None) or 'utf-8'
+
+_BANNER = (
+    "\n" + "="*70 + "\n"
+    "    SISTEMA DE AUTOMATIZACIÓN DOCUMENTAL CON IA\n"
+    "    Desarrollado por Jonathan Ibáñez\n"
+    "    Versión 1.0.0\n"
+    + "="*70 + "\n\n"
+).encode(_STDOUT_ENCODING, errors='replace')
+
+_MENU = (
+    "\nSelecciona una opción:\n"
+    "1. Solo Dashboard (Recomendado para empezar)\n"
+    "2. Sistema Completo (Dashboard + API)\n"
+    "3. Solo API\n"
+    "4. Abrir URLs en navegador\n"
+    "5. Salir\n"
+).encode(_STDOUT_ENCODING, errors='replace')
+
+def _write_block(data: bytes):
+    """Escribir un bloque de texto precodificado con una sola escritura"""
+    sys.stdout.flush()
+    buffer = getattr(sys.stdout, 'buffer', None)
+    
+    if buffer is None:
+        print(data.decode(_STDOUT_ENCODING), end='')
+        return
+    
+    buffer.write(data)
+    buffer.flush()
 
 def print_banner():
     """Mostrar información del sistema"""
-    print("\n" + "="*70)
-    print("    SISTEMA DE AUTOMATIZACIÓN DOCUMENTAL CON IA")  
-    print("    Desarrollado por Jonathan Ibáñez")
-    print("    Versión 1.0.0")
-    print("="*70 + "\n")
+    _write_block(_BANNER)
 
 def check_python_version():
     """Verificar versión de Python"""
     version = sys.version_info
     print(f"Python {version.major}.{version.minor}.{version.micro} detectado")
     
-    if version.major < 3 or (version.major == 3 and version.minor < 8):
+    if version < (3, 8):
         print("ERROR: Se requiere Python 3.8 o superior")
         return False
     return True
 
+def _try_import(item):
+    """Comprobar si un paquete está instalado sin ejecutarlo (paquete, descripción, ok)"""
+    package, desc = item
+    return package, desc, importlib.util.find_spec(package) is not None
+
 def check_dependencies():
     """Verificar dependencias críticas"""
     print("Verificando dependencias del sistema...")
@@ -43,11 +122,14 @@ def check_dependencies():
     missing = []
     installed = []
     
-    for package, desc in required.items():
-        try:
-            __import__(package)
+    # Comprobar todos los paquetes en paralelo
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(required)) as executor:
+        results = list(executor.map(_try_import, required.items()))
+    
+    for package, desc, ok in results:
+        if ok:
             installed.append(f"OK  {package} - {desc}")
-        except ImportError:
+        else:
             missing.append(package)
             installed.append(f"FALTA  {package} - {desc}")
     
@@ -55,11 +137,18 @@ def check_dependencies():
         print(f"  {item}")
     
     if missing:
+        import subprocess
+        
         print(f"\nInstalando dependencias faltantes: {', '.join(missing)}")
         try:
             subprocess.check_call([
-                sys.executable, '-m', 'pip', 'install', '--upgrade'
-            ] + missing)
+                sys.executable, '-m', 'pip', 'install',
+                '--no-input',
+                '--disable-pip-version-check',
+                '--quiet',
+                '--no-warn-script-location',
+                *missing
+            ])
             print("Dependencias instaladas correctamente")
         except subprocess.CalledProcessError as e:
             print(f"Error instalando dependencias: {e}")
@@ -67,85 +156,78 @@ def check_dependencies():
     
     return True
 
+@lru_cache(maxsize=None)
+def _cwd_entries() -> frozenset:
+    """Leer una sola vez el contenido del directorio actual"""
+    return frozenset(os.listdir('.'))
+
+@lru_cache(maxsize=None)
+def _locate(kind: str) -> Optional[str]:
+    """Localizar el primer archivo candidato existente (resultado cacheado)"""
+    entries = _cwd_entries()
+    
+    for file_path in _CANDIDATE_FILES[kind]:
+        if '/' in file_path:
+            if os.path.isfile(file_path):
+                return file_path
+        elif file_path in entries:
+            return file_path
+    
+    return None
+
 def find_dashboard_file():
     """Encontrar archivo del dashboard"""
-    possible_files = [
-        'src/dashboard/app.py',
-        'enhanced_dashboard.py',
-        'dashboard.py', 
-        'main_dashboard.py',
-        'app.py'
-    ]
+    file_path = _locate('dashboard')
     
-    for file_path in possible_files:
-        if os.path.exists(file_path):
-            print(f"Dashboard encontrado: {file_path}")
-            return file_path
+    if file_path:
+        print(f"Dashboard encontrado: {file_path}")
+        return file_path
     
     print("ERROR: No se encontró archivo de dashboard")
-    print("Archivos buscados:", possible_files)
+    print("Archivos buscados:", list(_CANDIDATE_FILES['dashboard']))
     return None
 
 def find_api_file():
     """Encontrar archivo de la API"""
-    possible_files = [
-        'src/api/main.py',
-        'api/main.py',
-        'main_api.py',
-        'api.py'
-    ]
+    file_path = _locate('api')
     
-    for file_path in possible_files:
-        if os.path.exists(file_path):
-            print(f"API encontrada: {file_path}")
-            return file_path
+    if file_path:
+        print(f"API encontrada: {file_path}")
+        return file_path
     
     print("AVISO: No se encontró archivo de API (opcional)")
     return None
 
 def create_env_file():
     """Crear archivo .env básico"""
-    if os.path.exists('.env'):
+    try:
+        fd = os.open('.env', os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
         print("Archivo .env ya existe")
         return
+    except Exception as e:
+        print(f"Error creando .env: {e}")
+        return
     
     print("Creando archivo .env...")
     
-    env_content = """# Configuración Sistema Automatización IA
-
-# Configuración Web
-DASHBOARD_HOST=127.0.0.1
-DASHBOARD_PORT=8501
-API_HOST=127.0.0.1
-API_PORT=8000
-
-# Configuración IA
-USE_OLLAMA=true
-OLLAMA_BASE_URL=http://localhost:11434
-DEFAULT_MODEL=llama3.1
-OPENAI_API_KEY=sk-opcional-para-gpt
-
-# Archivos
-UPLOAD_DIR=uploads
-MAX_FILE_SIZE=10485760
-
-# Sistema
-ENVIRONMENT=development
-DEBUG=true
-LOG_LEVEL=INFO
-
-# Dashboard
-PROJECT_NAME=Sistema de Automatización IA
-VERSION=1.0.0
-DESCRIPTION=Sistema de automatización documental con inteligencia artificial
-"""
-    
     try:
-        with open('.env', 'w', encoding='utf-8') as f:
-            f.write(env_content)
+        os.write(fd, _ENV_BYTES)
         print("Archivo .env creado exitosamente")
     except Exception as e:
         print(f"Error creando .env: {e}")
+    finally:
+        os.close(fd)
+
+@lru_cache(maxsize=None)
+def _api_module(api_file: str) -> str:
+    """Convertir la ruta del archivo de la API en la ruta de módulo para uvicorn"""
+    if api_file == 'src/api/main.py':
+        return 'src.api.main:app'
+    
+    if api_file.endswith('.py'):
+        api_file = api_file[:-3]
+    return api_file.replace('/', '.').replace('\\', '.') + ':app'
 
 def run_dashboard_only():
     """Ejecutar solo el dashboard"""
@@ -160,28 +242,20 @@ def run_dashboard_only():
     print("URL: http://localhost:8501")
     print("Presiona Ctrl+C para detener\n")
     
-    # Abrir navegador después de 3 segundos
-    def open_browser():
-        time.sleep(3)
-        try:
-            webbrowser.open('http://localhost:8501')
-            print("Navegador abierto automáticamente")
-        except:
-            pass
-    
-    browser_thread = threading.Thread(target=open_browser, daemon=True)
-    browser_thread.start()
-    
-    # Ejecutar Streamlit
+    # Ejecutar Streamlit en este mismo intérprete (Streamlit abre el navegador)
     try:
-        subprocess.run([
-            sys.executable, '-m', 'streamlit', 'run', 
+        from streamlit.web import cli as stcli
+        
+        sys.argv = [
+            'streamlit', 'run', 
             dashboard_file,
             '--server.port', '8501',
             '--server.address', '127.0.0.1',
-            '--server.headless', 'true',
             '--browser.gatherUsageStats', 'false'
-        ])
+        ]
+        stcli.main()
+        return True
+    except SystemExit:
         return True
     except KeyboardInterrupt:
         print("\nDashboard detenido por el usuario")
@@ -199,23 +273,16 @@ def run_api_only():
         return False
     
     # Convertir ruta a módulo para uvicorn
-    if api_file == 'src/api/main.py':
-        module_path = 'src.api.main:app'
-    else:
-        module_path = api_file.replace('.py', '').replace('/', '.').replace('\\', '.') + ':app'
+    module_path = _api_module(api_file)
     
     print(f"\nEjecutando API: {api_file}")
     print("Documentación: http://localhost:8000/docs")
     print("Presiona Ctrl+C para detener\n")
     
     try:
-        subprocess.run([
-            sys.executable, '-m', 'uvicorn', 
-            module_path,
-            '--host', '127.0.0.1',
-            '--port', '8000',
-            '--reload'
-        ])
+        import uvicorn
+        
+        uvicorn.run(module_path, host='127.0.0.1', port=8000, reload=True)
         return True
     except KeyboardInterrupt:
         print("\nAPI detenida por el usuario")
@@ -224,6 +291,20 @@ def run_api_only():
         print(f"Error ejecutando API: {e}")
         return False
 
+def _wait_port(host, port, timeout=10.0):
+    """Esperar hasta que un puerto TCP acepte conexiones"""
+    import socket
+    import time
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            if sock.connect_ex((host, port)) == 0:
+                return True
+        time.sleep(0.05)
+    
+    return False
+
 def run_full_system():
     """Ejecutar sistema completo (API + Dashboard)"""
     api_file = find_api_file()
@@ -239,28 +320,44 @@ def run_full_system():
     if api_file:
         print("API: http://localhost:8000/docs")
         
-        # Ejecutar API en hilo separado
+        import threading
+        import uvicorn
+        
+        # Ejecutar API en hilo separado (sin --reload: requiere el hilo principal)
         def run_api():
-            if api_file == 'src/api/main.py':
-                module_path = 'src.api.main:app'
-            else:
-                module_path = api_file.replace('.py', '').replace('/', '.').replace('\\', '.') + ':app'
-                
-            subprocess.run([
-                sys.executable, '-m', 'uvicorn',
-                module_path,
-                '--host', '127.0.0.1',
-                '--port', '8000',
-                '--reload'
-            ])
+            uvicorn.run(_api_module(api_file), host='127.0.0.1', port=8000)
         
         api_thread = threading.Thread(target=run_api, daemon=True)
         api_thread.start()
-        time.sleep(2)  # Dar tiempo a la API para iniciar
+        
+        # Esperar a que la API acepte conexiones antes de lanzar el dashboard
+        if not _wait_port('127.0.0.1', 8000):
+            print("AVISO: La API tarda en iniciar, continuando con el dashboard")
     
     # Ejecutar dashboard en hilo principal
     return run_dashboard_only()
 
+def _open_urls():
+    """Abrir dashboard y documentación de la API en el navegador"""
+    import webbrowser
+    
+    print("\nAbriendo URLs en navegador...")
+    webbrowser.open('http://localhost:8501')
+    webbrowser.open('http://localhost:8000/docs')
+
+def _exit_program():
+    """Salir del menú sin ejecutar nada"""
+    print("Saliendo del programa...")
+
+# Acciones del menú principal
+ACTIONS = {
+    '1': run_dashboard_only,
+    '2': run_full_system,
+    '3': run_api_only,
+    '4': _open_urls,
+    '5': _exit_program
+}
+
 def main():
     """Función principal"""
     print_banner()
@@ -275,36 +372,18 @@ def main():
     
     create_env_file()
     
-    print("\nSelecciona una opción:")
-    print("1. Solo Dashboard (Recomendado para empezar)")
-    print("2. Sistema Completo (Dashboard + API)")
-    print("3. Solo API")
-    print("4. Abrir URLs en navegador")
-    print("5. Salir")
+    _write_block(_MENU)
     
     while True:
         try:
             choice = input("\nSelecciona opción (1-5): ").strip()
+            action = ACTIONS.get(choice)
             
-            if choice == '1':
-                run_dashboard_only()
-                break
-            elif choice == '2':
-                run_full_system()
-                break
-            elif choice == '3':
-                run_api_only()
+            if action:
+                action()
                 break
-            elif choice == '4':
-                print("\nAbriendo URLs en navegador...")
-                webbrowser.open('http://localhost:8501')
-                webbrowser.open('http://localhost:8000/docs')
-                break
-            elif choice == '5':
-                print("Saliendo del programa...")
-                break
-            else:
-                print("Opción inválida, intenta de nuevo")
+            
+            print("Opción inválida, intenta de nuevo")
         except KeyboardInterrupt:
             print("\nSaliendo...")
             break
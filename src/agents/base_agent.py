@@ -2,13 +2,35 @@
 🤖 Agente Base - Clase padre para todos los agentes del sistema
 """
 import asyncio
+import heapq
+import itertools
+import sys
+import time
 import uuid
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime
-from enum import Enum
-from typing import Any, Dict, List, Optional, Union
-from dataclasses import dataclass
-from loguru import logger
+from enum import Enum, IntEnum
+from typing import Any, ClassVar, Dict, List, Optional, Set, Tuple, Union
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+try:
+    import msgspec  # Serialización rápida opcional del estado
+except ImportError:
+    msgspec = None
+
+# `slots=True` en dataclasses solo existe a partir de Python 3.10
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@lru_cache(maxsize=1)
+def _get_logger():
+    """Importar loguru solo cuando se crea el primer agente"""
+    from loguru import logger
+    return logger
+
+# Máximo de tareas terminadas que se conservan para consultar su resultado
+MAX_COMPLETED_TASKS = 1000
 
 class AgentStatus(Enum):
     """Estados posibles de un agente"""
@@ -17,52 +39,79 @@ class AgentStatus(Enum):
     ERROR = "error"
     STOPPED = "stopped"
 
-class TaskPriority(Enum):
+class TaskPriority(IntEnum):
     """Prioridades de tareas"""
     LOW = 1
     MEDIUM = 2
     HIGH = 3
     CRITICAL = 4
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class AgentTask:
     """Estructura de una tarea para el agente"""
     id: str
     name: str
     data: Dict[str, Any]
     priority: TaskPriority = TaskPriority.MEDIUM
-    created_at: datetime = None
+    created_at: datetime = field(default_factory=datetime.now)
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     result: Optional[Any] = None
     error: Optional[str] = None
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now()
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class AgentMetrics:
     """Métricas de rendimiento del agente"""
     tasks_completed: int = 0
     tasks_failed: int = 0
     total_processing_time: float = 0.0
-    average_processing_time: float = 0.0
     last_activity: Optional[datetime] = None
     uptime: float = 0.0
     
-    def update_on_success(self, processing_time: float):
+    @property
+    def average_processing_time(self) -> float:
+        """Tiempo medio de procesamiento (calculado al consultarlo)"""
+        return self.total_processing_time / self.tasks_completed if self.tasks_completed else 0.0
+    
+    def update_on_success(self, processing_time: float, now: Optional[datetime] = None):
         """Actualizar métricas cuando una tarea es exitosa"""
         self.tasks_completed += 1
         self.total_processing_time += processing_time
-        self.average_processing_time = self.total_processing_time / max(1, self.tasks_completed)
-        self.last_activity = datetime.now()
+        self.last_activity = now or datetime.now()
     
     def update_on_failure(self):
         """Actualizar métricas cuando una tarea falla"""
         self.tasks_failed += 1
         self.last_activity = datetime.now()
 
+if msgspec is not None:
+    class CurrentTaskPayload(msgspec.Struct):
+        """Tarea en ejecución dentro del estado del agente"""
+        id: str
+        name: str
+        started_at: Optional[str] = None
+    
+    class MetricsPayload(msgspec.Struct):
+        """Métricas del agente dentro del estado"""
+        tasks_completed: int
+        tasks_failed: int
+        average_processing_time: float
+        uptime: float
+        last_activity: Optional[str] = None
+    
+    class StatusPayload(msgspec.Struct):
+        """Estado del agente tipado para `msgspec.json.encode`"""
+        id: str
+        name: str
+        description: str
+        status: str
+        created_at: str
+        started_at: Optional[str]
+        current_task: Optional[CurrentTaskPayload]
+        tasks_in_queue: int
+        capabilities: Tuple[str, ...]
+        metrics: MetricsPayload
+
 class BaseAgent(ABC):
     """
     🤖 Clase base para todos los agentes del sistema
@@ -74,6 +123,20 @@ class BaseAgent(ABC):
     - Manejo de errores
     """
     
+    # Capacidades del agente (constante compartida por todas las instancias)
+    CAPABILITIES: ClassVar[Tuple[str, ...]] = ()
+    
+    # Atributos de instancia sin __dict__ (las subclases declaran los suyos)
+    __slots__ = (
+        "id", "name", "description", "config",
+        "status", "created_at", "started_at",
+        "_created_at_iso", "_started_at_iso", "_start_monotonic",
+        "task_queue", "_task_counter", "current_task",
+        "_tasks_by_id", "_completed", "_cancelled", "_task_futures",
+        "_wake", "_worker_task", "_status_template",
+        "metrics", "logger", "max_concurrent_tasks", "timeout"
+    )
+    
     def __init__(
         self,
         name: str,
@@ -90,19 +153,40 @@ class BaseAgent(ABC):
         self.created_at = datetime.now()
         self.started_at: Optional[datetime] = None
         
-        # Sistema de tareas
-        self.task_queue: List[AgentTask] = []
+        # Cadenas ISO cacheadas y reloj monotónico para el uptime
+        self._created_at_iso = self.created_at.isoformat()
+        self._started_at_iso: Optional[str] = None
+        self._start_monotonic: Optional[float] = None
+        
+        # Sistema de tareas (heap de (-prioridad, orden de llegada, tarea))
+        self.task_queue: List[Tuple[int, int, AgentTask]] = []
+        self._task_counter = itertools.count()
         self.current_task: Optional[AgentTask] = None
         
+        # Índices por ID para consultas O(1)
+        self._tasks_by_id: Dict[str, AgentTask] = {}
+        self._completed: "OrderedDict[str, AgentTask]" = OrderedDict()
+        self._cancelled: Set[str] = set()
+        
+        # Futures de quienes esperan a que termine una tarea (ver wait_for_task)
+        self._task_futures: Dict[str, asyncio.Future] = {}
+        
+        # Worker persistente que consume la cola (se crea dentro del event loop)
+        self._wake: Optional[asyncio.Event] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        
+        # Caché de la parte fija de get_status()
+        self._status_template: Optional[Dict[str, Any]] = None
+        
         # Métricas y logging
         self.metrics = AgentMetrics()
-        self.logger = logger.bind(agent=self.name, agent_id=self.id)
+        self.logger = _get_logger().bind(agent=self.name, agent_id=self.id)
         
         # Configuración
         self.max_concurrent_tasks = self.config.get("max_concurrent_tasks", 1)
         self.timeout = self.config.get("timeout", 300)  # 5 minutos por defecto
         
-        self.logger.info(f"🚀 Agente {self.name} inicializado")
+        self.logger.info("🚀 Agente {agent_name} inicializado", agent_name=self.name)
     
     # 🎯 Métodos abstractos (deben ser implementados por cada agente)
     
@@ -114,13 +198,12 @@ class BaseAgent(ABC):
         """
         pass
     
-    @abstractmethod
-    def get_capabilities(self) -> List[str]:
+    def get_capabilities(self) -> Tuple[str, ...]:
         """
-        Retorna lista de capacidades del agente
-        Ejemplo: ["extract_text", "analyze_sentiment", "generate_summary"]
+        Retorna las capacidades del agente (definidas en CAPABILITIES)
+        Ejemplo: ("extract_text", "analyze_sentiment", "generate_summary")
         """
-        pass
+        return self.CAPABILITIES
     
     # 🔧 Métodos de gestión de tareas
     
@@ -131,39 +214,63 @@ class BaseAgent(ABC):
         priority: TaskPriority = TaskPriority.MEDIUM
     ) -> str:
         """Agregar nueva tarea a la cola"""
+        task_id = str(uuid.uuid4())
         task = AgentTask(
-            id=str(uuid.uuid4()),
+            id=task_id,
             name=name,
             data=data,
-            priority=priority
+            priority=priority,
+            created_at=datetime.now()
         )
         
-        # Insertar según prioridad
-        self.task_queue.append(task)
-        self.task_queue.sort(key=lambda t: t.priority.value, reverse=True)
+        # Insertar según prioridad (FIFO dentro de la misma prioridad)
+        heapq.heappush(
+            self.task_queue,
+            (-priority, next(self._task_counter), task)
+        )
+        self._tasks_by_id[task_id] = task
         
-        self.logger.info(f"📝 Nueva tarea agregada: {name} (ID: {task.id})")
+        self.logger.info("📝 Nueva tarea agregada: {task_name} (ID: {task_id})", task_name=name, task_id=task_id)
         
-        # Procesar si el agente está disponible
-        if self.status == AgentStatus.IDLE:
-            asyncio.create_task(self._process_next_task())
+        # Despertar al worker si el agente está activo
+        if self.status != AgentStatus.STOPPED:
+            self._ensure_worker()
+            self._wake.set()
         
-        return task.id
+        return task_id
     
     async def get_task_result(self, task_id: str) -> Optional[Any]:
         """Obtener resultado de una tarea completada"""
-        # Buscar en tareas completadas
-        completed_tasks = [t for t in self.task_queue if t.id == task_id and t.completed_at]
+        # Buscar en tareas terminadas o, si no, en la tarea actual
+        task = self._completed.get(task_id)
+        if task is None and self.current_task and self.current_task.id == task_id:
+            task = self.current_task
         
-        if completed_tasks:
-            return completed_tasks[0].result
+        return task.result if task and task.completed_at else None
+    
+    async def wait_for_task(self, task_id: str) -> Optional[Any]:
+        """
+        Esperar a que termine una tarea y devolver su resultado
         
-        # Si es la tarea actual
-        if self.current_task and self.current_task.id == task_id:
-            if self.current_task.completed_at:
-                return self.current_task.result
+        Devuelve None si la tarea falla, se cancela o no existe. Se puede
+        combinar con asyncio.wait_for para limitar la espera.
+        """
+        task = self._completed.get(task_id)
+        if task is not None:
+            return task.result
         
-        return None
+        current_task = self.current_task
+        is_current = current_task is not None and current_task.id == task_id
+        if not is_current and (task_id not in self._tasks_by_id or task_id in self._cancelled):
+            return None
+        
+        future = self._task_futures.get(task_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._task_futures[task_id] = future
+        
+        # shield: un timeout de quien espera no cancela el future compartido
+        return await asyncio.shield(future)
     
     async def cancel_task(self, task_id: str) -> bool:
         """Cancelar una tarea pendiente"""
@@ -171,9 +278,18 @@ class BaseAgent(ABC):
         if self.current_task and self.current_task.id == task_id:
             return False
         
-        # Remover de la cola
-        self.task_queue = [t for t in self.task_queue if t.id != task_id]
-        self.logger.info(f"❌ Tarea cancelada: {task_id}")
+        if task_id not in self._tasks_by_id or task_id in self._cancelled:
+            return False
+        
+        # Marcar como cancelada; se descarta al salir del heap
+        self._cancelled.add(task_id)
+        self._resolve_task_future(task_id, None)
+        
+        # Compactar solo si las lápidas superan la mitad del heap (coste amortizado O(1))
+        if len(self._cancelled) * 2 > len(self.task_queue):
+            self._compact_queue()
+        
+        self.logger.info("❌ Tarea cancelada: {task_id}", task_id=task_id)
         return True
     
     # 🔄 Métodos de control del agente
@@ -183,52 +299,134 @@ class BaseAgent(ABC):
         if self.status != AgentStatus.STOPPED:
             self.status = AgentStatus.IDLE
             self.started_at = datetime.now()
-            self.logger.info(f"▶️ Agente {self.name} iniciado")
+            self._started_at_iso = self.started_at.isoformat()
+            self._start_monotonic = time.monotonic()
+            self.logger.info("▶️ Agente {agent_name} iniciado", agent_name=self.name)
             
             # Procesar tareas pendientes
+            self._ensure_worker()
             if self.task_queue:
-                asyncio.create_task(self._process_next_task())
+                self._wake.set()
     
     async def stop(self):
         """Detener el agente"""
-        self.status = AgentStatus.STOPPED
-        self.logger.info(f"⏹️ Agente {self.name} detenido")
+        previous, self.status = self.status, AgentStatus.STOPPED
+        if previous != AgentStatus.STOPPED:
+            from ..core.registry import on_agent_status_change
+            on_agent_status_change(self, previous, self.status)
+        
+        # Dejar que el worker salga de su bucle
+        if self._wake is not None:
+            self._wake.set()
+        self.logger.info("⏹️ Agente {agent_name} detenido", agent_name=self.name)
     
     async def restart(self):
         """Reiniciar el agente"""
         await self.stop()
         await asyncio.sleep(1)
         await self.start()
-        self.logger.info(f"🔄 Agente {self.name} reiniciado")
+        self.logger.info("🔄 Agente {agent_name} reiniciado", agent_name=self.name)
     
     # 🔍 Métodos de información
     
     def get_status(self) -> Dict[str, Any]:
         """Obtener estado actual del agente"""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "description": self.description,
-            "status": self.status.value,
-            "created_at": self.created_at.isoformat(),
-            "started_at": self.started_at.isoformat() if self.started_at else None,
-            "current_task": {
-                "id": self.current_task.id,
-                "name": self.current_task.name,
-                "started_at": self.current_task.started_at.isoformat() if self.current_task.started_at else None
-            } if self.current_task else None,
-            "tasks_in_queue": len(self.task_queue),
-            "capabilities": self.get_capabilities(),
-            "metrics": {
-                "tasks_completed": self.metrics.tasks_completed,
-                "tasks_failed": self.metrics.tasks_failed,
-                "average_processing_time": round(self.metrics.average_processing_time, 2),
-                "uptime": self._calculate_uptime(),
-                "last_activity": self.metrics.last_activity.isoformat() if self.metrics.last_activity else None
+        # Los campos inmutables se construyen una sola vez
+        if self._status_template is None:
+            self._status_template = {
+                "id": self.id,
+                "name": self.name,
+                "description": self.description,
+                "created_at": self._created_at_iso,
+                "capabilities": self.get_capabilities(),
             }
+        
+        status = self._status_template.copy()
+        current_task = self.current_task
+        metrics = self.metrics
+        last_activity = metrics.last_activity
+        
+        status["status"] = self.status.value
+        status["started_at"] = self._started_at_iso
+        status["current_task"] = {
+            "id": current_task.id,
+            "name": current_task.name,
+            "started_at": current_task.started_at.isoformat() if current_task.started_at else None
+        } if current_task else None
+        status["tasks_in_queue"] = len(self.task_queue) - len(self._cancelled)
+        status["metrics"] = {
+            "tasks_completed": metrics.tasks_completed,
+            "tasks_failed": metrics.tasks_failed,
+            "average_processing_time": round(metrics.average_processing_time, 2),
+            "uptime": self._calculate_uptime(),
+            "last_activity": last_activity.isoformat() if last_activity else None
         }
+        return status
         
     
+    def get_status_struct(self) -> "StatusPayload":
+        """Obtener el estado como `StatusPayload` de msgspec (requiere msgspec)"""
+        if msgspec is None:
+            raise RuntimeError("msgspec no está instalado")
+        
+        current_task = self.current_task
+        metrics = self.metrics
+        last_activity = metrics.last_activity
+        
+        return StatusPayload(
+            id=self.id,
+            name=self.name,
+            description=self.description,
+            status=self.status.value,
+            created_at=self._created_at_iso,
+            started_at=self._started_at_iso,
+            current_task=CurrentTaskPayload(
+                id=current_task.id,
+                name=current_task.name,
+                started_at=current_task.started_at.isoformat() if current_task.started_at else None
+            ) if current_task else None,
+            tasks_in_queue=len(self.task_queue) - len(self._cancelled),
+            capabilities=self.get_capabilities(),
+            metrics=MetricsPayload(
+                tasks_completed=metrics.tasks_completed,
+                tasks_failed=metrics.tasks_failed,
+                average_processing_time=round(metrics.average_processing_time, 2),
+                uptime=self._calculate_uptime(),
+                last_activity=last_activity.isoformat() if last_activity else None
+            )
+        )
+    
+    def get_task_info(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtener el estado de una tarea (búsqueda O(1))
+        
+        status es "pending", "running", "completed" o "failed" (con su error);
+        None si la tarea no existe, se canceló o ya salió del historial.
+        """
+        finished = self._completed.get(task_id)
+        if finished is not None:
+            return {
+                "id": finished.id,
+                "name": finished.name,
+                "priority": finished.priority.name,
+                "created_at": finished.created_at.isoformat(),
+                "status": "failed" if finished.error is not None else "completed",
+                "error": finished.error
+            }
+        
+        task = self._tasks_by_id.get(task_id)
+        if task is None or task_id in self._cancelled:
+            return None
+        
+        current_task = self.current_task
+        return {
+            "id": task.id,
+            "name": task.name,
+            "priority": task.priority.name,
+            "created_at": task.created_at.isoformat(),
+            "status": "running" if current_task is not None and current_task.id == task_id else "pending"
+        }
+    
     def get_queue_status(self) -> List[Dict[str, Any]]:
         """Obtener estado de la cola de tareas"""
         return [
@@ -239,24 +437,51 @@ class BaseAgent(ABC):
                 "created_at": task.created_at.isoformat(),
                 "status": "completed" if task.completed_at else "pending"
             }
-            for task in self.task_queue
+            for _, _, task in sorted(self.task_queue)
+            if task.id not in self._cancelled
         ]
     
     # 🔒 Métodos privados
     
+    def _ensure_worker(self):
+        """Crear el worker de la cola si no está en ejecución"""
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        if self._worker_task is None or self._worker_task.done():
+            self._worker_task = asyncio.create_task(self._worker())
+    
+    async def _worker(self):
+        """Bucle único que procesa la cola mientras el agente esté activo"""
+        while self.status != AgentStatus.STOPPED:
+            await self._wake.wait()
+            self._wake.clear()
+            
+            while self.task_queue and self.status != AgentStatus.STOPPED:
+                await self._process_next_task()
+    
     async def _process_next_task(self):
         """Procesar la siguiente tarea en la cola"""
         if not self.task_queue or self.status == AgentStatus.STOPPED:
             return
         
-        # Tomar la tarea de mayor prioridad
-        task = self.task_queue.pop(0)
+        # Tomar la tarea de mayor prioridad, descartando las canceladas
+        task = self._pop_next_task()
+        if task is None:
+            return
+        
+        # Alias locales para el camino caliente
+        logger = self.logger
+        metrics = self.metrics
+        task_id = task.id
+        task_name = task.name
+        
         self.current_task = task
         self.status = AgentStatus.WORKING
         
         task.started_at = datetime.now()
-        self.logger.info(f"🔄 Procesando tarea: {task.name} (ID: {task.id})")
+        logger.info("🔄 Procesando tarea: {task_name} (ID: {task_id})", task_name=task_name, task_id=task_id)
         
+        start_time = time.perf_counter()
         try:
             # Procesar con timeout
             result = await asyncio.wait_for(
@@ -265,39 +490,74 @@ class BaseAgent(ABC):
             )
             
             # Tarea completada exitosamente
+            completed_at = datetime.now()
             task.result = result
-            task.completed_at = datetime.now()
+            task.completed_at = completed_at
             
-            # Actualizar métricas
-            processing_time = (task.completed_at - task.started_at).total_seconds()
-            self.metrics.update_on_success(processing_time)
+            # Actualizar métricas (reloj monotónico de alta resolución)
+            processing_time = time.perf_counter() - start_time
+            metrics.update_on_success(processing_time, completed_at)
             
-            self.logger.success(f"✅ Tarea completada: {task.name} ({processing_time:.2f}s)")
+            logger.success(
+                "✅ Tarea completada: {task_name} ({processing_time:.2f}s)",
+                task_name=task_name, processing_time=processing_time
+            )
             
         except asyncio.TimeoutError:
             task.error = f"Timeout después de {self.timeout} segundos"
-            self.metrics.update_on_failure()
-            self.logger.error(f"⏱️ Timeout en tarea: {task.name}")
+            metrics.update_on_failure()
+            logger.error("⏱️ Timeout en tarea: {task_name}", task_name=task_name)
             
         except Exception as e:
             task.error = str(e)
-            self.metrics.update_on_failure()
-            self.logger.error(f"❌ Error en tarea {task.name}: {str(e)}")
+            metrics.update_on_failure()
+            logger.error("❌ Error en tarea {task_name}: {error}", task_name=task_name, error=task.error)
         
         finally:
-            # Limpiar estado
-            self.current_task = None
-            self.status = AgentStatus.IDLE
+            # Mover a tareas terminadas (LRU acotado)
+            completed = self._completed
+            self._tasks_by_id.pop(task_id, None)
+            completed[task_id] = task
+            if len(completed) > MAX_COMPLETED_TASKS:
+                completed.popitem(last=False)
+            self._resolve_task_future(task_id, task.result)
             
-            # Procesar siguiente tarea si existe
-            if self.task_queue and self.status != AgentStatus.STOPPED:
-                asyncio.create_task(self._process_next_task())
+            # Limpiar estado (sin pisar un stop() recibido durante la tarea)
+            self.current_task = None
+            if self.status == AgentStatus.WORKING:
+                self.status = AgentStatus.IDLE
+    
+    def _resolve_task_future(self, task_id: str, result: Any):
+        """Despertar a quienes esperan la tarea (wait_for_task)"""
+        future = self._task_futures.pop(task_id, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+    
+    def _compact_queue(self):
+        """Eliminar del heap las tareas canceladas"""
+        cancelled = self._cancelled
+        self.task_queue = [entry for entry in self.task_queue if entry[2].id not in cancelled]
+        heapq.heapify(self.task_queue)
+        for task_id in cancelled:
+            self._tasks_by_id.pop(task_id, None)
+        cancelled.clear()
+    
+    def _pop_next_task(self) -> Optional[AgentTask]:
+        """Extraer la siguiente tarea no cancelada del heap"""
+        while self.task_queue:
+            _, _, task = heapq.heappop(self.task_queue)
+            if task.id in self._cancelled:
+                self._cancelled.discard(task.id)
+                self._tasks_by_id.pop(task.id, None)
+                continue
+            return task
+        return None
     
     def _calculate_uptime(self) -> float:
         """Calcular tiempo de actividad en segundos"""
-        if not self.started_at:
+        if self._start_monotonic is None:
             return 0.0
-        return (datetime.now() - self.started_at).total_seconds()
+        return time.monotonic() - self._start_monotonic
     
     # 🎨 Métodos de utilidad
     
@@ -336,6 +596,7 @@ class AgentFactory:
     def register(cls, agent_type: str, agent_class: type):
         """Registrar un nuevo tipo de agente"""
         cls._agent_classes[agent_type] = agent_class
+        cls.get_available_types.cache_clear()
     
     @classmethod
     def create_agent(
@@ -353,9 +614,18 @@ class AgentFactory:
         return agent_class(name=name, description=description, config=config)
     
     @classmethod
-    def get_available_types(cls) -> List[str]:
-        """Obtener tipos de agentes disponibles"""
-        return list(cls._agent_classes.keys())
+    def get_type_of(cls, agent_class: type) -> Optional[str]:
+        """Obtener el tipo registrado de una clase de agente"""
+        for agent_type, registered_class in cls._agent_classes.items():
+            if registered_class is agent_class:
+                return agent_type
+        return None
+    
+    @classmethod
+    @lru_cache(maxsize=1)
+    def get_available_types(cls) -> Tuple[str, ...]:
+        """Obtener tipos de agentes disponibles (cacheado hasta el próximo register)"""
+        return tuple(cls._agent_classes)
 
 # 🚀 Exportar clases principales
 __all__ = [
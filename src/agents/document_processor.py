@@ -1,24 +1,169 @@
 """
 📄 Document Processor Agent - Procesa y extrae información de documentos
 """
+import asyncio
+import copy
+import functools
+import io
 import os
 import re
+import stat
+import numpy as np
 import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
 
 # Imports para procesamiento de documentos
 import PyPDF2
 import docx
+from docx.oxml.ns import qn
 from PIL import Image
 import pytesseract  # OCR
 
+try:
+    import pypdfium2 as pdfium  # Extracción de PDF en código nativo (PDFium)
+except ImportError:
+    pdfium = None
+
+try:
+    import tesserocr  # API persistente de Tesseract (sin subprocess por imagen)
+except ImportError:
+    tesserocr = None
+
+try:
+    import aiopytesseract  # OCR asíncrono (subprocess no bloqueante)
+except ImportError:
+    aiopytesseract = None
+
+try:
+    from charset_normalizer import from_bytes as detect_charset  # Detección de codificación
+except ImportError:
+    detect_charset = None
+
+try:
+    import ahocorasick  # Búsqueda de muchos patrones en una sola pasada
+except ImportError:
+    ahocorasick = None
+
+try:
+    from lingua import Language, LanguageDetectorBuilder  # Detección de idioma local
+except ImportError:
+    LanguageDetectorBuilder = None
+
+try:
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer  # Sentimiento local (inglés)
+except ImportError:
+    SentimentIntensityAnalyzer = None
+
 # Import del agente base
 from .base_agent import BaseAgent, AgentTask, TaskPriority, validate_agent_config
 from ..core.config import AgentConfig
 from ..services.ai_service import AIService
 
+# Documentos procesados en paralelo dentro de un lote
+DOC_CONCURRENCY = int(os.environ.get("DOC_CONCURRENCY", os.cpu_count() or 4))
+
+# Procesos para extraer lotes grandes (1 o menos desactiva el pool de procesos)
+DOC_PROCESS_WORKERS = int(os.environ.get(
+    "LOAD_DOCUMENTS_NUMBER_OF_THREADS", max(1, (os.cpu_count() or 2) - 1)
+))
+
+# Tamaño mínimo de lote a partir del cual se extrae en procesos separados
+DOC_PROCESS_POOL_THRESHOLD = int(os.environ.get("DOC_PROCESS_POOL_THRESHOLD", 8))
+
+# Extensiones de imagen procesadas con OCR
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tiff")
+
+# Etiquetas WordprocessingML recorridas al extraer texto de DOCX
+_W_P, _W_TBL, _W_TR, _W_TC = qn("w:p"), qn("w:tbl"), qn("w:tr"), qn("w:tc")
+_W_TEXT_TAGS = {qn("w:t"): None, qn("w:tab"): "\t", qn("w:br"): "\n", qn("w:cr"): "\n"}
+
+# Páginas de PDF con menos caracteres que esto se consideran escaneadas (OCR)
+PDF_OCR_MIN_CHARS = int(os.environ.get("PDF_OCR_MIN_CHARS", 10))
+
+# Escala de renderizado de páginas de PDF para OCR (1 = 72 dpi)
+PDF_OCR_RENDER_SCALE = 2
+
+# Páginas renderizadas en cola esperando OCR (limita la RAM del pipeline)
+DOC_PIPELINE_DEPTH = max(1, int(os.environ.get("DOC_PIPELINE_DEPTH", 4)))
+
+# Resultados de análisis recientes que se conservan por agente
+ANALYSIS_CACHE_SIZE = 4096
+
+# Palabras frecuentes usadas para detectar el idioma
+SPANISH_PATTERNS = ("el ", "la ", "de ", "que ", "en ", "un ", "es ", "se ", "no ", "te ")
+ENGLISH_PATTERNS = ("the ", "and ", "to ", "of ", "a ", "in ", "is ", "it ", "you ", "that ")
+LANGUAGE_PATTERN_COUNT = len(SPANISH_PATTERNS) + len(ENGLISH_PATTERNS)
+
+# Patrones de entidades extraídas sin IA (compilados una sola vez)
+ENTITY_PATTERNS = (
+    (re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b"), "EMAIL"),
+    (re.compile(r"\b[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){3,7}(?: ?[A-Z0-9]{1,4})?\b"), "IBAN"),
+    (re.compile(
+        r"\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b|\b\d{4}-\d{2}-\d{2}\b"
+        r"|\b\d{1,2} de [a-záéíóú]+ de \d{4}\b",
+        re.IGNORECASE
+    ), "FECHA"),
+    (re.compile(r"\b\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?\s?(?:€|EUR|USD|\$)|[$€]\s?\d[\d.,]*\d"), "DINERO"),
+    (re.compile(r"(?<![\w+])(?:\+\d{2,3}[ .-]?)?\d{3}[ .-]?\d{2,3}[ .-]?\d{2,3}[ .-]?\d{0,3}\b"), "TELEFONO"),
+)
+
+def _build_language_automaton():
+    """Autómata Aho-Corasick con los patrones de idioma (None sin pyahocorasick)"""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for language, patterns in (("es", SPANISH_PATTERNS), ("en", ENGLISH_PATTERNS)):
+        for pattern in patterns:
+            automaton.add_word(pattern, (language, pattern))
+    automaton.make_automaton()
+    return automaton
+
+_LANGUAGE_AUTOMATON = _build_language_automaton()
+
+@functools.lru_cache(maxsize=1)
+def _get_language_detector():
+    """Detector lingua español/inglés, construido en el primer uso (None sin lingua)"""
+    if LanguageDetectorBuilder is None:
+        return None
+    return LanguageDetectorBuilder.from_languages(Language.SPANISH, Language.ENGLISH).build()
+
+@functools.lru_cache(maxsize=1)
+def _get_sentiment_analyzer():
+    """Analizador VADER, construido en el primer uso (None sin vaderSentiment)"""
+    if SentimentIntensityAnalyzer is None:
+        return None
+    return SentimentIntensityAnalyzer()
+
+# Patrones para diferentes tipos de documentos (mapeo de solo lectura)
+CLASSIFY_PATTERNS = MappingProxyType({
+    "factura": ("factura", "invoice", "total:", "iva", "subtotal", "importe"),
+    "contrato": ("contrato", "contract", "cláusula", "firma", "partes contratantes"),
+    "cv": ("curriculum", "experiencia laboral", "educación", "habilidades"),
+    "informe": ("informe", "report", "análisis", "conclusiones", "recomendaciones"),
+    "email": ("de:", "para:", "asunto:", "from:", "to:", "subject:"),
+    "legal": ("artículo", "ley", "decreto", "resolución", "jurisprudencia")
+})
+
+def _build_classify_automaton():
+    """Autómata Aho-Corasick con las palabras clave de cada tipo (None sin pyahocorasick)"""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for doc_type, keywords in CLASSIFY_PATTERNS.items():
+        for keyword in keywords:
+            automaton.add_word(keyword, (doc_type, keyword))
+    automaton.make_automaton()
+    return automaton
+
+_CLASSIFY_AUTOMATON = _build_classify_automaton()
+
 @validate_agent_config(["supported_formats", "max_file_size"])
 class DocumentProcessorAgent(BaseAgent):
     """
@@ -32,6 +177,23 @@ class DocumentProcessorAgent(BaseAgent):
     - Clasificación automática de documentos
     """
     
+    CAPABILITIES = (
+        "extract_text_pdf",
+        "extract_text_docx", 
+        "extract_text_image_ocr",
+        "classify_document",
+        "extract_entities",
+        "analyze_sentiment",
+        "extract_structured_data",
+        "generate_summary",
+        "detect_language"
+    )
+    
+    __slots__ = (
+        "ai_service", "processed_documents", "extracted_pages", "ocr_operations",
+        "skipped_analyses", "_tess", "_tess_lock", "_pool", "_analysis_cache"
+    )
+    
     def __init__(self, name: str, description: str, config: Optional[Dict[str, Any]] = None):
         # Configuración por defecto
         default_config = {
@@ -39,7 +201,8 @@ class DocumentProcessorAgent(BaseAgent):
             "ocr_enabled": True,
             "ai_analysis_enabled": True,
             "auto_classify": True,
-            "extract_entities": True
+            "extract_entities": True,
+            "min_analyze_chars": 50  # Textos más cortos no pasan por el análisis
         }
         
         if config:
@@ -54,22 +217,32 @@ class DocumentProcessorAgent(BaseAgent):
         self.processed_documents = 0
         self.extracted_pages = 0
         self.ocr_operations = 0
+        self.skipped_analyses = 0
+        
+        # API de Tesseract persistente (se crea en el primer OCR)
+        self._tess = None
+        self._tess_lock: Optional[asyncio.Lock] = None
+        
+        # Pool de procesos para lotes grandes (se crea bajo demanda)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        # Caché LRU de idioma, clasificación y sentimiento por contenido
+        self._analysis_cache: "OrderedDict[tuple, Any]" = OrderedDict()
         
         self.logger.info("📄 Document Processor Agent inicializado")
     
-    def get_capabilities(self) -> List[str]:
-        """Capacidades del agente procesador de documentos"""
-        return [
-            "extract_text_pdf",
-            "extract_text_docx", 
-            "extract_text_image_ocr",
-            "classify_document",
-            "extract_entities",
-            "analyze_sentiment",
-            "extract_structured_data",
-            "generate_summary",
-            "detect_language"
-        ]
+    async def stop(self):
+        """Detener el agente y liberar la API de Tesseract y el pool de procesos"""
+        await super().stop()
+        
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        
+        if self._tess is not None:
+            async with self._tess_lock:
+                self._tess.End()
+                self._tess = None
     
     async def process_task(self, task: AgentTask) -> Any:
         """Procesar tarea específica del documento"""
@@ -106,25 +279,16 @@ class DocumentProcessorAgent(BaseAgent):
     
     # 📄 Métodos de extracción de texto
     
+    @staticmethod
+    async def _run_blocking(func, *args):
+        """Ejecutar una función bloqueante en el thread pool del event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+    
     async def _extract_text(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Extraer texto de un documento"""
         file_path = data.get("file_path")
-        
-        if not file_path or not os.path.exists(file_path):
-            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
-        
-        file_extension = Path(file_path).suffix.lower()
-        
-        result = {
-            "file_path": file_path,
-            "file_name": Path(file_path).name,
-            "file_size": os.path.getsize(file_path),
-            "processed_at": datetime.now().isoformat(),
-            "text": "",
-            "metadata": {},
-            "pages": 0,
-            "word_count": 0
-        }
+        result, file_extension = self._new_text_result(file_path)
         
         try:
             if file_extension == ".pdf":
@@ -136,53 +300,91 @@ class DocumentProcessorAgent(BaseAgent):
             elif file_extension in [".txt"]:
                 result.update(await self._extract_from_txt(file_path))
             
-            elif file_extension in [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]:
+            elif file_extension in IMAGE_EXTENSIONS:
                 result.update(await self._extract_from_image(file_path))
             
             else:
                 raise ValueError(f"Formato no soportado: {file_extension}")
             
-            # Calcular estadísticas
-            result["word_count"] = len(result["text"].split())
-            result["char_count"] = len(result["text"])
-            
-            # Detectar idioma si la IA está habilitada
-            if self.config.get("ai_analysis_enabled"):
-                result["language"] = await self._detect_language(result["text"])
-            
-            self.processed_documents += 1
-            self.logger.success(f"✅ Texto extraído: {result['word_count']} palabras")
-            
-            return result
+            return await self._finalize_text_result(result)
             
         except Exception as e:
             self.logger.error(f"❌ Error extrayendo texto: {str(e)}")
             raise
     
+    def _new_text_result(self, file_path: Optional[str]):
+        """Resultado base de extracción y extensión del archivo (valida que exista)"""
+        # Un solo stat y un solo Path por documento
+        try:
+            path = Path(file_path)
+            file_stat = path.stat()
+        except (TypeError, OSError):
+            file_stat = None
+        if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+        
+        return {
+            "file_path": file_path,
+            "file_name": path.name,
+            "file_size": file_stat.st_size,
+            "processed_at": datetime.now().isoformat(),
+            "text": "",
+            "metadata": {},
+            "pages": 0,
+            "word_count": 0
+        }, path.suffix.lower()
+    
+    async def _finalize_text_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Completar estadísticas e idioma de un resultado de extracción"""
+        # Calcular estadísticas
+        result["word_count"] = len(result["text"].split())
+        result["char_count"] = len(result["text"])
+        
+        # Detectar idioma si la IA está habilitada (no en textos casi vacíos)
+        if self.config.get("ai_analysis_enabled"):
+            if self._is_too_short(result["text"]):
+                self.skipped_analyses += 1
+            else:
+                result["language"] = await self._detect_language(result["text"])
+        
+        self.processed_documents += 1
+        self.logger.success(f"✅ Texto extraído: {result['word_count']} palabras")
+        
+        return result
+    
     async def _extract_from_pdf(self, file_path: str) -> Dict[str, Any]:
         """Extraer texto de PDF"""
         text = ""
         pages = 0
         metadata = {}
+        extraction_method = "pypdf2"
         
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                pages = len(pdf_reader.pages)
+            if pdfium is not None:
+                page_texts, metadata = await self._run_blocking(self._extract_pdf_pages_with_pdfium, file_path)
+                pages = len(page_texts)
+                extraction_method = "pypdfium2"
                 
-                # Extraer metadata
-                if pdf_reader.metadata:
-                    metadata = {
-                        "title": pdf_reader.metadata.get('/Title', ''),
-                        "author": pdf_reader.metadata.get('/Author', ''),
-                        "subject": pdf_reader.metadata.get('/Subject', ''),
-                        "creator": pdf_reader.metadata.get('/Creator', '')
-                    }
+                # OCR solo de las páginas sin capa de texto (PDFs mixtos)
+                if self.config.get("ocr_enabled"):
+                    scanned = [
+                        page_num for page_num, page_text in enumerate(page_texts)
+                        if len(page_text.strip()) < PDF_OCR_MIN_CHARS
+                    ]
+                    if scanned:
+                        try:
+                            ocr_texts = await self._ocr_pdf_pages(file_path, scanned)
+                        except Exception as e:
+                            # Conservar el texto digital si el OCR no está disponible
+                            self.logger.warning(f"⚠️ OCR de páginas escaneadas falló: {str(e)}")
+                        else:
+                            for page_num, page_text in zip(scanned, ocr_texts):
+                                page_texts[page_num] = page_text
+                            extraction_method = "pypdfium2+ocr"
                 
-                # Extraer texto de todas las páginas
-                for page_num in range(pages):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
+                text = "\n".join(page_texts)
+            else:
+                text, pages, metadata = await self._run_blocking(self._extract_pdf_with_pypdf2, file_path)
             
             self.extracted_pages += pages
             
@@ -198,84 +400,251 @@ class DocumentProcessorAgent(BaseAgent):
             "text": text.strip(),
             "pages": pages,
             "metadata": metadata,
-            "extraction_method": "pypdf2"
+            "extraction_method": extraction_method
         }
     
-    async def _extract_from_docx(self, file_path: str) -> Dict[str, Any]:
-        """Extraer texto de documento Word"""
+    @staticmethod
+    def _extract_pdf_pages_with_pdfium(file_path: str):
+        """Texto de cada página y metadata de un PDF usando pypdfium2"""
+        pdf = pdfium.PdfDocument(file_path)
         try:
-            doc = docx.Document(file_path)
-            
-            # Extraer texto de párrafos
-            paragraphs = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    paragraphs.append(paragraph.text.strip())
+            pages = len(pdf)
             
-            text = "\n".join(paragraphs)
-            
-            # Extraer texto de tablas
-            tables_text = []
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = []
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            row_text.append(cell.text.strip())
-                    if row_text:
-                        tables_text.append(" | ".join(row_text))
+            # Extraer metadata
+            info = pdf.get_metadata_dict()
+            metadata = {
+                "title": info.get("Title", ""),
+                "author": info.get("Author", ""),
+                "subject": info.get("Subject", ""),
+                "creator": info.get("Creator", "")
+            } if info else {}
             
-            if tables_text:
-                text += "\n\nTABLAS:\n" + "\n".join(tables_text)
+            # Extraer texto de todas las páginas
+            page_texts = []
+            for page_num in range(pages):
+                page = pdf[page_num]
+                textpage = page.get_textpage()
+                page_texts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+        
+        return page_texts, metadata
+    
+    @staticmethod
+    def _count_pdf_pages(file_path: str) -> int:
+        """Número de páginas de un PDF usando pypdfium2"""
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    
+    @staticmethod
+    def _render_pdf_page(pdf, page_num: int) -> Image.Image:
+        """Renderizar una página de un PDF abierto a imagen PIL para OCR"""
+        page = pdf[page_num]
+        try:
+            return page.render(scale=PDF_OCR_RENDER_SCALE).to_pil()
+        finally:
+            page.close()
+    
+    async def _ocr_pdf_pages(self, file_path: str, page_numbers: List[int]) -> List[str]:
+        """
+        OCR de las páginas indicadas de un PDF (texto en el mismo orden)
+        
+        Pipeline en tres etapas unidas por colas: renderizado -> OCR -> ensamblado.
+        El renderizado de la página N+1 se solapa con el OCR de la página N y la
+        cola acotada limita las imágenes en memoria a DOC_PIPELINE_DEPTH.
+        """
+        render_q: asyncio.Queue = asyncio.Queue(maxsize=DOC_PIPELINE_DEPTH)
+        ocr_q: asyncio.Queue = asyncio.Queue()
+        workers = min(DOC_PIPELINE_DEPTH, len(page_numbers))
+        texts: List[str] = [""] * len(page_numbers)
+        
+        # Al fallar una etapa: render() deja de producir y cierra el PDF solo
+        # cuando no queda ningún renderizado en curso en el thread pool
+        stop = asyncio.Event()
+        
+        async def render():
+            pdf = await self._run_blocking(pdfium.PdfDocument, file_path)
+            try:
+                for index, page_num in enumerate(page_numbers):
+                    if stop.is_set():
+                        return
+                    image = await self._run_blocking(self._render_pdf_page, pdf, page_num)
+                    await render_q.put((index, image))
+            finally:
+                pdf.close()
+            for _ in range(workers):
+                if stop.is_set():
+                    return
+                await render_q.put(None)
+        
+        async def ocr():
+            while True:
+                item = await render_q.get()
+                if item is None:
+                    await ocr_q.put(None)
+                    return
+                index, image = item
+                text, _ = await self._ocr_image(image)
+                await ocr_q.put((index, text))
+        
+        async def collect():
+            finished = 0
+            while finished < workers:
+                item = await ocr_q.get()
+                if item is None:
+                    finished += 1
+                else:
+                    index, text = item
+                    texts[index] = text
+        
+        render_task = asyncio.ensure_future(render())
+        consumers = [asyncio.ensure_future(collect())]
+        consumers += [asyncio.ensure_future(ocr()) for _ in range(workers)]
+        try:
+            # render() nunca se cancela: podría cerrar el PDF con un renderizado en curso
+            await asyncio.gather(asyncio.shield(render_task), *consumers)
+        except BaseException:
+            # Si una etapa falla, detener las demás y esperar a que terminen
+            stop.set()
+            for consumer in consumers:
+                consumer.cancel()
+            # Vaciar la cola para que render() no quede bloqueado en put()
+            while not render_q.empty():
+                render_q.get_nowait()
+            await asyncio.gather(render_task, *consumers, return_exceptions=True)
+            raise
+        
+        return texts
+    
+    @staticmethod
+    def _extract_pdf_with_pypdf2(file_path: str):
+        """Texto, páginas y metadata de un PDF usando PyPDF2"""
+        metadata = {}
+        
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            pages = len(pdf_reader.pages)
             
-            # Metadata básica
-            metadata = {
-                "paragraphs_count": len(paragraphs),
-                "tables_count": len(doc.tables)
-            }
+            # Extraer metadata
+            if pdf_reader.metadata:
+                metadata = {
+                    "title": pdf_reader.metadata.get('/Title', ''),
+                    "author": pdf_reader.metadata.get('/Author', ''),
+                    "subject": pdf_reader.metadata.get('/Subject', ''),
+                    "creator": pdf_reader.metadata.get('/Creator', '')
+                }
             
-            return {
-                "text": text.strip(),
-                "pages": 1,  # Word no tiene concepto de páginas como PDF
-                "metadata": metadata,
-                "extraction_method": "docx"
-            }
+            # Extraer texto de todas las páginas (se une una sola vez al final)
+            page_texts = []
+            for page_num in range(pages):
+                page = pdf_reader.pages[page_num]
+                page_texts.append(page.extract_text() or "")
+        
+        return "\n".join(page_texts), pages, metadata
+    
+    async def _extract_from_docx(self, file_path: str) -> Dict[str, Any]:
+        """Extraer texto de documento Word"""
+        try:
+            return await self._run_blocking(self._extract_from_docx_sync, file_path)
             
         except Exception as e:
             self.logger.error(f"❌ Error extrayendo de DOCX: {str(e)}")
             raise
     
+    @staticmethod
+    def _extract_from_docx_sync(file_path: str) -> Dict[str, Any]:
+        """Extracción síncrona de DOCX (se ejecuta en el thread pool)"""
+        doc = docx.Document(file_path)
+        paragraph_text = DocumentProcessorAgent._docx_paragraph_text
+        
+        # Un solo recorrido del cuerpo XML: párrafos y tablas en orden de aparición
+        paragraphs = []
+        tables_text = []
+        tables_count = 0
+        for element in doc.element.body.iterchildren():
+            if element.tag == _W_P:
+                text = paragraph_text(element).strip()
+                if text:
+                    paragraphs.append(text)
+            elif element.tag == _W_TBL:
+                tables_count += 1
+                for row in element.iterchildren(_W_TR):
+                    row_text = []
+                    for cell in row.iterchildren(_W_TC):
+                        cell_text = "\n".join(paragraph_text(p) for p in cell.iterchildren(_W_P)).strip()
+                        if cell_text:
+                            row_text.append(cell_text)
+                    if row_text:
+                        tables_text.append(" | ".join(row_text))
+        
+        text = "\n".join(paragraphs)
+        if tables_text:
+            text += "\n\nTABLAS:\n" + "\n".join(tables_text)
+        
+        # Metadata básica
+        metadata = {
+            "paragraphs_count": len(paragraphs),
+            "tables_count": tables_count
+        }
+        
+        return {
+            "text": text.strip(),
+            "pages": 1,  # Word no tiene concepto de páginas como PDF
+            "metadata": metadata,
+            "extraction_method": "docx"
+        }
+    
+    @staticmethod
+    def _docx_paragraph_text(paragraph) -> str:
+        """Texto de un elemento w:p (incluye runs de hipervínculos y cuadros de texto)"""
+        return "".join(
+            (node.text or "") if _W_TEXT_TAGS[node.tag] is None else _W_TEXT_TAGS[node.tag]
+            for node in paragraph.iter(*_W_TEXT_TAGS)
+        )
+    
     async def _extract_from_txt(self, file_path: str) -> Dict[str, Any]:
         """Extraer texto de archivo de texto plano"""
+        return await self._run_blocking(self._extract_from_txt_sync, file_path)
+    
+    @staticmethod
+    def _extract_from_txt_sync(file_path: str) -> Dict[str, Any]:
+        """Lectura síncrona de texto plano (se ejecuta en el thread pool)"""
+        # Una sola lectura del disco; la decodificación se hace en memoria
+        data = Path(file_path).read_bytes()
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
-            
-            return {
-                "text": text.strip(),
-                "pages": 1,
-                "metadata": {"encoding": "utf-8"},
-                "extraction_method": "plain_text"
-            }
-            
+            text, encoding = data.decode("utf-8"), "utf-8"
         except UnicodeDecodeError:
-            # Intentar con otras codificaciones
-            encodings = ['latin-1', 'cp1252', 'ascii']
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as file:
-                        text = file.read()
-                    
-                    return {
-                        "text": text.strip(),
-                        "pages": 1,
-                        "metadata": {"encoding": encoding},
-                        "extraction_method": "plain_text"
-                    }
-                except UnicodeDecodeError:
-                    continue
-            
-            raise ValueError("No se pudo decodificar el archivo de texto")
+            # Detectar la codificación real; sin charset_normalizer, latin-1 (nunca falla)
+            best = None
+            if detect_charset is not None:
+                candidates = detect_charset(data)
+                best = candidates.best()
+                # En empate, preferir cp1252 (lo habitual en documentos en español)
+                if best is not None:
+                    best = next(
+                        (c for c in candidates if c.encoding == "cp1252" and c.chaos <= best.chaos),
+                        best
+                    )
+            if best is not None:
+                text, encoding = str(best), best.encoding
+            else:
+                text, encoding = data.decode("latin-1"), "latin-1"
+        
+        # Normalizar saltos de línea como hace open() en modo texto
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        
+        return {
+            "text": text.strip(),
+            "pages": 1,
+            "metadata": {"encoding": encoding},
+            "extraction_method": "plain_text"
+        }
     
     async def _extract_from_image(self, file_path: str) -> Dict[str, Any]:
         """Extraer texto de imagen usando OCR"""
@@ -283,40 +652,120 @@ class DocumentProcessorAgent(BaseAgent):
             raise ValueError("OCR no está habilitado")
         
         try:
-            # Abrir imagen
+            # Abrir imagen (solo lee la cabecera para los metadatos)
             image = Image.open(file_path)
             
-            # Extraer texto con OCR
-            text = pytesseract.image_to_string(image, lang='spa+eng')
-            
-            # Obtener información adicional
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-            confidence = sum([int(conf) for conf in data['conf'] if int(conf) > 0]) / len([conf for conf in data['conf'] if int(conf) > 0])
-            
-            metadata = {
-                "image_size": image.size,
-                "image_mode": image.mode,
-                "ocr_confidence": round(confidence, 2) if confidence > 0 else 0
-            }
-            
-            self.ocr_operations += 1
+            text, confidences = await self._ocr_image(image, file_path)
             
-            return {
-                "text": text.strip(),
-                "pages": 1,
-                "metadata": metadata,
-                "extraction_method": "ocr"
-            }
+            return self._ocr_result(image, text, confidences)
             
         except Exception as e:
             self.logger.error(f"❌ Error en OCR: {str(e)}")
             raise
     
+    async def _ocr_image(self, image: Image.Image, file_path: Optional[str] = None):
+        """OCR de una imagen con el mejor motor disponible (texto y confianzas)"""
+        if tesserocr is not None:
+            # La API no es thread-safe: una llamada a la vez fuera del event loop
+            if self._tess_lock is None:
+                self._tess_lock = asyncio.Lock()
+            async with self._tess_lock:
+                text, confidences = await self._run_blocking(self._ocr_with_tesserocr, image)
+        elif aiopytesseract is not None:
+            # Tesseract en subprocess asíncrono: no bloquea el event loop
+            source = file_path if file_path is not None else self._image_to_png(image)
+            # Una sola pasada de Tesseract: texto y confianzas salen del mismo TSV
+            data = await aiopytesseract.image_to_data(source, lang='spa+eng')
+            text = self._text_from_ocr_words(
+                ((word.block_num, word.par_num, word.line_num), word.text) for word in data
+            )
+            confidences = [float(word.conf) for word in data]
+        else:
+            text, confidences = await self._run_blocking(self._ocr_with_pytesseract, image)
+        
+        self.ocr_operations += 1
+        return text, confidences
+    
+    @staticmethod
+    def _image_to_png(image: Image.Image) -> bytes:
+        """Serializar una imagen en memoria como PNG"""
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+    
+    @staticmethod
+    def _ocr_with_pytesseract(image: Image.Image):
+        """OCR con pytesseract (texto y confianzas)"""
+        # Una sola pasada de Tesseract: texto y confianzas salen del mismo TSV
+        data = pytesseract.image_to_data(image, lang='spa+eng', output_type=pytesseract.Output.DICT)
+        text = DocumentProcessorAgent._text_from_ocr_words(
+            zip(zip(data['block_num'], data['par_num'], data['line_num']), data['text'])
+        )
+        return text, [float(conf) for conf in data['conf']]
+    
+    @staticmethod
+    def _text_from_ocr_words(words) -> str:
+        """Reconstruir el texto a partir de las palabras de image_to_data (una línea por línea de OCR)"""
+        lines = []
+        current_line = None
+        for line_key, word in words:
+            word = (word or "").strip()
+            if not word:
+                continue
+            if line_key != current_line:
+                lines.append([])
+                current_line = line_key
+            lines[-1].append(word)
+        return "\n".join(" ".join(line) for line in lines)
+    
+    def _ocr_with_tesserocr(self, image: Image.Image):
+        """OCR con la instancia persistente de tesserocr (texto y confianzas)"""
+        if self._tess is None:
+            self._tess = tesserocr.PyTessBaseAPI(lang='spa+eng')
+        
+        self._tess.SetImage(image)
+        return self._tess.GetUTF8Text(), [float(conf) for conf in self._tess.AllWordConfidences()]
+    
+    @classmethod
+    def _ocr_result(cls, image: Image.Image, text: str, confidences: List[float]) -> Dict[str, Any]:
+        """Resultado de extracción para una imagen procesada con OCR"""
+        confidence = cls._mean_confidence(confidences)
+        
+        metadata = {
+            "image_size": image.size,
+            "image_mode": image.mode,
+            "ocr_confidence": round(confidence, 2) if confidence > 0 else 0
+        }
+        
+        return {
+            "text": text.strip(),
+            "pages": 1,
+            "metadata": metadata,
+            "extraction_method": "ocr"
+        }
+    
+    @staticmethod
+    def _mean_confidence(confidences: List[float]) -> float:
+        """Confianza media de OCR ignorando valores no positivos"""
+        values = np.asarray(confidences, dtype=np.float64)
+        valid = values[values > 0]
+        return float(valid.mean()) if valid.size else 0.0
+    
     async def _extract_with_ocr(self, file_path: str) -> Dict[str, Any]:
         """Extraer usando OCR como fallback para PDFs problemáticos"""
-        # Nota: Esto requeriría convertir PDF a imágenes primero
-        # Por simplicidad, retornamos error por ahora
-        raise NotImplementedError("OCR fallback para PDF no implementado aún")
+        if pdfium is None:
+            raise ImportError("OCR de PDF requiere pypdfium2 para renderizar las páginas")
+        
+        pages = await self._run_blocking(self._count_pdf_pages, file_path)
+        page_texts = await self._ocr_pdf_pages(file_path, list(range(pages)))
+        self.extracted_pages += pages
+        
+        return {
+            "text": "\n".join(page_texts).strip(),
+            "pages": pages,
+            "metadata": {},
+            "extraction_method": "ocr"
+        }
     
     # 🧠 Métodos de análisis con IA
     
@@ -333,12 +782,20 @@ class DocumentProcessorAgent(BaseAgent):
             "word_count": len(text.split())
         }
         
+        # Texto insuficiente (p. ej. ruido de OCR): no lanzar el análisis con IA
+        if self._is_too_short(text):
+            self.skipped_analyses += 1
+            analysis["status"] = "too_short"
+            return analysis
+        
         if self.config.get("ai_analysis_enabled"):
             # Clasificación
             analysis["classification"] = await self._classify_text(text)
             
-            # Extracción de entidades
-            analysis["entities"] = await self._extract_entities_from_text(text)
+            # Extracción de entidades (regex por defecto, IA solo en modo "deep")
+            analysis["entities"] = await self._extract_entities_from_text(
+                text, mode=data.get("entities_mode", "fast")
+            )
             
             # Resumen
             analysis["summary"] = await self._generate_summary(text)
@@ -351,6 +808,10 @@ class DocumentProcessorAgent(BaseAgent):
         
         return analysis
     
+    def _is_too_short(self, text: str) -> bool:
+        """Indica si el texto no alcanza el mínimo configurado para analizarlo"""
+        return len(text.strip()) < self.config.get("min_analyze_chars", 50)
+    
     async def _classify_document(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Clasificar tipo de documento"""
         text = data.get("text", "")
@@ -374,21 +835,20 @@ class DocumentProcessorAgent(BaseAgent):
         """Clasificación básica usando patrones de texto"""
         text_lower = text.lower()
         name_lower = file_name.lower()
+        patterns = CLASSIFY_PATTERNS
         
-        # Patrones para diferentes tipos de documentos
-        patterns = {
-            "factura": ["factura", "invoice", "total:", "iva", "subtotal", "importe"],
-            "contrato": ["contrato", "contract", "cláusula", "firma", "partes contratantes"],
-            "cv": ["curriculum", "experiencia laboral", "educación", "habilidades"],
-            "informe": ["informe", "report", "análisis", "conclusiones", "recomendaciones"],
-            "email": ["de:", "para:", "asunto:", "from:", "to:", "subject:"],
-            "legal": ["artículo", "ley", "decreto", "resolución", "jurisprudencia"]
-        }
-        
-        scores = {}
-        for doc_type, keywords in patterns.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower or keyword in name_lower)
-            scores[doc_type] = score
+        if _CLASSIFY_AUTOMATON is not None:
+            # Una pasada por el texto y otra por el nombre; cada palabra clave cuenta una vez
+            found = {hit for _, hit in _CLASSIFY_AUTOMATON.iter(text_lower)}
+            found.update(hit for _, hit in _CLASSIFY_AUTOMATON.iter(name_lower))
+            scores = dict.fromkeys(patterns, 0)
+            for doc_type, _ in found:
+                scores[doc_type] += 1
+        else:
+            scores = {}
+            for doc_type, keywords in patterns.items():
+                score = sum(1 for keyword in keywords if keyword in text_lower or keyword in name_lower)
+                scores[doc_type] = score
         
         # Encontrar el tipo con mayor puntuación
         if scores:
@@ -405,9 +865,70 @@ class DocumentProcessorAgent(BaseAgent):
     
     # 🔍 Métodos auxiliares con IA
     
+    async def _cached_analysis(self, key: tuple, compute):
+        """Devolver un análisis cacheado o calcularlo y guardarlo (LRU acotado)"""
+        cache = self._analysis_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return copy.copy(cache[key])
+        
+        result = await compute()
+        cache[key] = result
+        if len(cache) > ANALYSIS_CACHE_SIZE:
+            cache.popitem(last=False)
+        return copy.copy(result)
+    
     async def _classify_text(self, text: str) -> Dict[str, Any]:
+        """Clasificar texto usando IA (cacheado por el fragmento enviado al modelo)"""
+        return await self._cached_analysis(
+            ("classify", text[:1000]), lambda: self._classify_text_uncached(text)
+        )
+    
+    async def _classify_text_uncached(self, text: str) -> Dict[str, Any]:
         """Clasificar texto usando IA"""
-        prompt = f"""
+        response = await self.ai_service.generate_text(self._classify_prompt(text))
+        return self._parse_classification(response)
+    
+    async def _classify_texts(self, texts: List[str]) -> List[Union[Dict[str, Any], Exception]]:
+        """Clasificar varios textos con IA en una sola tanda de prompts (usa la caché)"""
+        cache = self._analysis_cache
+        keys = [("classify", text[:1000]) for text in texts]
+        
+        # Valores de la tanda: aciertos de caché y un prompt por fragmento distinto
+        resolved = {}
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key in resolved or key in pending:
+                continue
+            if key in cache:
+                cache.move_to_end(key)
+                resolved[key] = cache[key]
+            else:
+                pending[key] = self._classify_prompt(text)
+        
+        if pending:
+            responses = await self.ai_service.generate_batch(
+                list(pending.values()), return_exceptions=True
+            )
+            for key, response in zip(pending, responses):
+                if isinstance(response, Exception):
+                    resolved[key] = response
+                else:
+                    resolved[key] = cache[key] = self._parse_classification(response)
+        
+        # Recortar la caché solo cuando la tanda ya tiene todos sus valores
+        while len(cache) > ANALYSIS_CACHE_SIZE:
+            cache.popitem(last=False)
+        
+        return [
+            resolved[key] if isinstance(resolved[key], Exception) else copy.copy(resolved[key])
+            for key in keys
+        ]
+    
+    @staticmethod
+    def _classify_prompt(text: str) -> str:
+        """Prompt de clasificación para un texto"""
+        return f"""
         Analiza el siguiente texto y clasifícalo en una de estas categorías:
         - factura: facturas, recibos, documentos de compra
         - contrato: contratos, acuerdos, términos legales  
@@ -421,9 +942,10 @@ class DocumentProcessorAgent(BaseAgent):
         
         Responde solo con: tipo|confianza (0-1)
         """
-        
-        response = await self.ai_service.generate_text(prompt)
-        
+    
+    @staticmethod
+    def _parse_classification(response: str) -> Dict[str, Any]:
+        """Interpretar la respuesta tipo|confianza del modelo"""
         try:
             parts = response.strip().split("|")
             return {
@@ -433,7 +955,26 @@ class DocumentProcessorAgent(BaseAgent):
         except:
             return {"type": "otros", "confidence": 0.1}
     
-    async def _extract_entities_from_text(self, text: str) -> List[Dict[str, Any]]:
+    async def _extract_entities_from_text(self, text: str, mode: str = "fast") -> List[Dict[str, Any]]:
+        """Extraer entidades con regex (modo "fast") o con IA (modo "deep")"""
+        if mode == "deep":
+            return await self._extract_entities_llm(text)
+        return self._extract_entities_regex(text)
+    
+    @staticmethod
+    def _extract_entities_regex(text: str) -> List[Dict[str, Any]]:
+        """Extraer emails, IBANs, fechas, importes y teléfonos sin llamar a la IA"""
+        entities = []
+        seen = set()
+        for pattern, entity_type in ENTITY_PATTERNS:
+            for match in pattern.finditer(text):
+                value = match.group().strip()
+                if (entity_type, value) not in seen:
+                    seen.add((entity_type, value))
+                    entities.append({"type": entity_type, "value": value})
+        return entities
+    
+    async def _extract_entities_llm(self, text: str) -> List[Dict[str, Any]]:
         """Extraer entidades del texto usando IA"""
         prompt = f"""
         Extrae las siguientes entidades del texto:
@@ -478,7 +1019,18 @@ class DocumentProcessorAgent(BaseAgent):
         return await self.ai_service.generate_text(prompt)
     
     async def _analyze_sentiment(self, text: str) -> Dict[str, Any]:
+        """Analizar sentimiento del texto (cacheado por el fragmento enviado al modelo)"""
+        return await self._cached_analysis(
+            ("sentiment", text[:1000]), lambda: self._analyze_sentiment_uncached(text)
+        )
+    
+    async def _analyze_sentiment_uncached(self, text: str) -> Dict[str, Any]:
         """Analizar sentimiento del texto"""
+        # VADER solo es fiable en inglés; el resto de idiomas sigue usando la IA
+        analyzer = _get_sentiment_analyzer()
+        if analyzer is not None and await self._detect_language(text) == "inglés":
+            return self._sentiment_from_vader(analyzer.polarity_scores(text[:1000]))
+        
         prompt = f"""
         Analiza el sentimiento del siguiente texto.
         Responde solo con: positivo|neutro|negativo|confianza (0-1)
@@ -497,16 +1049,50 @@ class DocumentProcessorAgent(BaseAgent):
         except:
             return {"sentiment": "neutro", "confidence": 0.1}
     
+    @staticmethod
+    def _sentiment_from_vader(scores: Dict[str, float]) -> Dict[str, Any]:
+        """Convertir las puntuaciones de VADER al formato positivo|neutro|negativo"""
+        compound = scores["compound"]
+        if compound >= 0.05:
+            return {"sentiment": "positivo", "confidence": round(compound, 2)}
+        if compound <= -0.05:
+            return {"sentiment": "negativo", "confidence": round(-compound, 2)}
+        return {"sentiment": "neutro", "confidence": round(scores["neu"], 2)}
+    
     async def _detect_language(self, text: str) -> str:
+        """Detectar idioma del texto (cacheado por longitud y hash del contenido)"""
+        return await self._cached_analysis(
+            ("language", len(text), hash(text)), lambda: self._detect_language_uncached(text)
+        )
+    
+    async def _detect_language_uncached(self, text: str) -> str:
         """Detectar idioma del texto"""
-        # Detección simple por patrones comunes
-        spanish_patterns = ["el ", "la ", "de ", "que ", "en ", "un ", "es ", "se ", "no ", "te "]
-        english_patterns = ["the ", "and ", "to ", "of ", "a ", "in ", "is ", "it ", "you ", "that "]
+        detector = _get_language_detector()
+        if detector is not None:
+            # Modelo local de lingua (fuera del event loop, es CPU intensivo)
+            language = await self._run_blocking(detector.detect_language_of, text)
+            if language == Language.SPANISH:
+                return "español"
+            if language == Language.ENGLISH:
+                return "inglés"
+            return "desconocido"
         
+        # Detección simple por patrones comunes (cada patrón cuenta una vez)
         text_lower = text.lower()
         
-        spanish_score = sum(1 for pattern in spanish_patterns if pattern in text_lower)
-        english_score = sum(1 for pattern in english_patterns if pattern in text_lower)
+        if _LANGUAGE_AUTOMATON is not None:
+            # Una sola pasada sobre el texto para todos los patrones
+            found = set()
+            for _, match in _LANGUAGE_AUTOMATON.iter(text_lower):
+                found.add(match)
+                if len(found) == LANGUAGE_PATTERN_COUNT:
+                    break
+            
+            spanish_score = sum(1 for language, _ in found if language == "es")
+            english_score = len(found) - spanish_score
+        else:
+            spanish_score = sum(1 for pattern in SPANISH_PATTERNS if pattern in text_lower)
+            english_score = sum(1 for pattern in ENGLISH_PATTERNS if pattern in text_lower)
         
         if spanish_score > english_score:
             return "español"
@@ -529,35 +1115,115 @@ class DocumentProcessorAgent(BaseAgent):
             "summary": {}
         }
         
-        for file_path in file_paths:
-            try:
-                # Procesar cada documento
-                doc_result = await self._extract_text({"file_path": file_path})
-                
-                # Análisis básico
-                if self.config.get("auto_classify"):
-                    classification = await self._classify_document({
-                        "text": doc_result["text"],
-                        "file_name": doc_result["file_name"]
-                    })
-                    doc_result["classification"] = classification
-                
-                results["documents"].append(doc_result)
-                results["processed"] += 1
-                
-            except Exception as e:
-                self.logger.error(f"❌ Error procesando {file_path}: {str(e)}")
+        # Lotes grandes: extracción en procesos separados (evita contención del GIL)
+        pool = None
+        if DOC_PROCESS_WORKERS > 1 and len(file_paths) >= DOC_PROCESS_POOL_THRESHOLD:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=DOC_PROCESS_WORKERS)
+            pool = self._pool
+        
+        # Con IA, la clasificación se hace al final en una sola tanda de prompts
+        classify_with_ai = bool(self.config.get("auto_classify") and self.config.get("ai_analysis_enabled"))
+        
+        # Procesar los documentos en paralelo con concurrencia acotada
+        semaphore = asyncio.Semaphore(DOC_CONCURRENCY)
+        
+        async def process_one(file_path: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._process_batch_document(file_path, pool, classify=not classify_with_ai)
+        
+        outcomes = await asyncio.gather(
+            *[process_one(file_path) for file_path in file_paths],
+            return_exceptions=True
+        )
+        
+        if classify_with_ai:
+            outcomes = await self._classify_batch_outcomes(outcomes)
+        
+        for file_path, outcome in zip(file_paths, outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.error(f"❌ Error procesando {file_path}: {str(outcome)}")
                 results["failed"] += 1
                 results["documents"].append({
                     "file_path": file_path,
-                    "error": str(e)
+                    "error": str(outcome)
                 })
+            else:
+                results["documents"].append(outcome)
+                results["processed"] += 1
         
         # Generar resumen del lote
         results["summary"] = self._generate_batch_summary(results["documents"])
         
         return results
     
+    async def _process_batch_document(
+        self,
+        file_path: str,
+        pool: Optional[ProcessPoolExecutor] = None,
+        classify: bool = True
+    ) -> Dict[str, Any]:
+        """Extraer y clasificar un documento del lote"""
+        if pool is not None:
+            doc_result = await self._extract_text_in_pool(file_path, pool)
+        else:
+            doc_result = await self._extract_text({"file_path": file_path})
+        
+        # Análisis básico
+        if classify and self.config.get("auto_classify"):
+            classification = await self._classify_document({
+                "text": doc_result["text"],
+                "file_name": doc_result["file_name"]
+            })
+            doc_result["classification"] = classification
+        
+        return doc_result
+    
+    async def _classify_batch_outcomes(self, outcomes: List[Any]) -> List[Any]:
+        """Añadir la clasificación (reglas + IA) a los documentos extraídos del lote"""
+        extracted = [index for index, outcome in enumerate(outcomes) if not isinstance(outcome, Exception)]
+        ai_results = await self._classify_texts([outcomes[index]["text"] for index in extracted])
+        
+        outcomes = list(outcomes)
+        for index, ai_classification in zip(extracted, ai_results):
+            if isinstance(ai_classification, Exception):
+                # Igual que antes: un fallo de la IA marca el documento como fallido
+                outcomes[index] = ai_classification
+                continue
+            
+            doc_result = outcomes[index]
+            doc_result["classification"] = {
+                "basic_classification": self._classify_by_patterns(doc_result["text"], doc_result["file_name"]),
+                "ai_classification": ai_classification,
+                "confidence": ai_classification.get("confidence", 0)
+            }
+        
+        return outcomes
+    
+    async def _extract_text_in_pool(self, file_path: str, pool: ProcessPoolExecutor) -> Dict[str, Any]:
+        """Extraer texto de un documento en el pool de procesos"""
+        result, file_extension = self._new_text_result(file_path)
+        
+        loop = asyncio.get_running_loop()
+        extracted = await loop.run_in_executor(
+            pool, _extract_worker, file_path, bool(self.config.get("ocr_enabled"))
+        )
+        
+        if extracted.get("needs_ocr"):
+            # PDF con páginas escaneadas o ilegible: mismo camino (y OCR) que fuera del pool
+            result.update(await self._extract_from_pdf(file_path))
+            return await self._finalize_text_result(result)
+        
+        result.update(extracted)
+        
+        # Estadísticas que en el proceso principal actualizan los extractores
+        if result["extraction_method"] == "ocr":
+            self.ocr_operations += 1
+        elif file_extension == ".pdf":
+            self.extracted_pages += result["pages"]
+        
+        return await self._finalize_text_result(result)
+    
     def _generate_batch_summary(self, documents: List[Dict]) -> Dict[str, Any]:
         """Generar resumen de procesamiento por lotes"""
         successful_docs = [doc for doc in documents if "error" not in doc]
@@ -601,9 +1267,69 @@ class DocumentProcessorAgent(BaseAgent):
             "documents_processed": self.processed_documents,
             "pages_extracted": self.extracted_pages,
             "ocr_operations": self.ocr_operations,
+            "skipped_analyses": self.skipped_analyses,
             "avg_pages_per_doc": round(self.extracted_pages / max(1, self.processed_documents), 2)
         }
 
+# 🧵 Extracción en procesos separados (lotes grandes)
+
+# API de Tesseract propia de cada proceso del pool
+_worker_tess = None
+
+def _extract_worker(file_path: str, ocr_enabled: bool) -> Dict[str, Any]:
+    """Extraer texto en un proceso del pool (función de módulo, serializable)"""
+    global _worker_tess
+    file_extension = Path(file_path).suffix.lower()
+    
+    if file_extension == ".pdf":
+        # Con OCR habilitado, los PDFs que lo necesitan vuelven al proceso
+        # principal ({"needs_ocr": True}), que hace el OCR igual que _extract_from_pdf
+        try:
+            if pdfium is not None:
+                page_texts, metadata = DocumentProcessorAgent._extract_pdf_pages_with_pdfium(file_path)
+                if ocr_enabled and any(len(page_text.strip()) < PDF_OCR_MIN_CHARS for page_text in page_texts):
+                    return {"needs_ocr": True}
+                text, pages = "\n".join(page_texts), len(page_texts)
+                extraction_method = "pypdfium2"
+            else:
+                text, pages, metadata = DocumentProcessorAgent._extract_pdf_with_pypdf2(file_path)
+                extraction_method = "pypdf2"
+        except Exception:
+            if ocr_enabled:
+                return {"needs_ocr": True}
+            raise
+        
+        return {
+            "text": text.strip(),
+            "pages": pages,
+            "metadata": metadata,
+            "extraction_method": extraction_method
+        }
+    
+    if file_extension == ".docx":
+        return DocumentProcessorAgent._extract_from_docx_sync(file_path)
+    
+    if file_extension == ".txt":
+        return DocumentProcessorAgent._extract_from_txt_sync(file_path)
+    
+    if file_extension in IMAGE_EXTENSIONS:
+        if not ocr_enabled:
+            raise ValueError("OCR no está habilitado")
+        
+        image = Image.open(file_path)
+        if tesserocr is not None:
+            if _worker_tess is None:
+                _worker_tess = tesserocr.PyTessBaseAPI(lang='spa+eng')
+            _worker_tess.SetImage(image)
+            text = _worker_tess.GetUTF8Text()
+            confidences = [float(conf) for conf in _worker_tess.AllWordConfidences()]
+        else:
+            text, confidences = DocumentProcessorAgent._ocr_with_pytesseract(image)
+        
+        return DocumentProcessorAgent._ocr_result(image, text, confidences)
+    
+    raise ValueError(f"Formato no soportado: {file_extension}")
+
 # 🏭 Registrar el agente en el factory
 from .base_agent import AgentFactory
 AgentFactory.register("document_processor", DocumentProcessorAgent)
\ No newline at end of file
@@ -5,38 +5,79 @@ Sistema de Agentes de IA para Automatización Empresarial
 El punto de entrada de la API con los endpoints principales
 """
 import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Optional
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel, Field
 import uvicorn
+from loguru import logger
+
+try:
+    import uvloop  # Event loop en C sobre libuv (menos overhead por callback)
+except ImportError:
+    uvloop = None
+
+try:
+    import httptools  # Parser HTTP en C para uvicorn
+except ImportError:
+    httptools = None
+
+try:
+    from gunicorn.app.base import BaseApplication  # Gestor de procesos (no disponible en Windows)
+except ImportError:
+    BaseApplication = None
 
 # Imports locales
-from ..core.config import settings, DashboardConfig
-from ..core.registry import agent_registry, register_agent
+from ..core.config import settings, DashboardConfig, create_directories
+from ..core.registry import (
+    agent_registry, register_agent, active_count, connect_registry, disconnect_registry
+)
 from ..agents.base_agent import AgentFactory
 from ..agents.document_processor import DocumentProcessorAgent
 from ..services.ai_service import ai_service
+from ..services.ai_tasks import prompt_tasks
 from ..utils.logger import setup_logging
+from ..utils.clock import iso_now, run_clock
 
 # Imports de rutas
 from .routes.agents import router as agents_router
 from .routes.tasks import router as tasks_router
 from .routes.health import router as health_router
+from .responses import DefaultResponse
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestión del ciclo de vida de la aplicación"""
     
     # 🚀 Startup
+    # Thread pool por defecto (extracción de documentos) dimensionado a los núcleos
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=os.cpu_count())
+    )
+    create_directories()
     setup_logging()
     
-    # Inicializar agentes por defecto
-    await initialize_default_agents()
+    # Registro de agentes compartido entre workers (Redis)
+    if settings.SHARED_AGENT_REGISTRY:
+        await connect_registry(settings.REDIS_URL)
+    
+    # Inicializar agentes por defecto en segundo plano: el servidor acepta
+    # conexiones de inmediato y /api/v1/health/ready indica cuándo terminan
+    app.state.agents_ready = asyncio.Event()
+    startup_task = asyncio.create_task(initialize_default_agents(app.state.agents_ready))
+    app.state.agents_startup = startup_task
+    
+    # Pool de workers de las generaciones asíncronas (/api/v1/ai/generate)
+    prompt_tasks.start()
+    
+    # Reloj de las marcas de tiempo de las respuestas (se refresca cada segundo)
+    clock_task = asyncio.create_task(run_clock())
     
     print("🤖 Agentic AI Hub API iniciada")
     print(f"📊 Dashboard disponible en: http://{settings.DASHBOARD_HOST}:{settings.DASHBOARD_PORT}")
@@ -45,7 +86,13 @@ async def lifespan(app: FastAPI):
     yield
     
     # 🛑 Shutdown
+    if not startup_task.done():
+        startup_task.cancel()
+    clock_task.cancel()
+    await asyncio.gather(startup_task, clock_task, return_exceptions=True)
     await shutdown_agents()
+    await prompt_tasks.close()
+    await disconnect_registry()
     print("👋 Agentic AI Hub API detenida")
 
 # 🌟 Crear aplicación FastAPI
@@ -56,6 +103,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=DefaultResponse,
     openapi_tags=[
         {
             "name": "agents",
@@ -76,18 +124,22 @@ app = FastAPI(
     ]
 )
 
-# 🌐 Middleware CORS
+# 🌐 Middleware CORS (lista explícita; el comodín solo en desarrollo)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # En producción, especificar dominios
+    allow_origins=["*"] if settings.DEBUG else settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["authorization", "content-type"],
+    max_age=86400,  # Los navegadores cachean el preflight un día
 )
 
-# 📁 Servir archivos estáticos
-app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# 📁 Servir archivos estáticos (solo en desarrollo; en producción los sirve
+# el proxy inverso, ver deploy/nginx.conf)
+if settings.DEBUG:
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+    # `uploads` se crea en el arranque (lifespan), no al importar
+    app.mount("/uploads", StaticFiles(directory="uploads", check_dir=False), name="uploads")
 
 # 🛣️ Incluir routers
 app.include_router(agents_router, prefix="/api/v1/agents", tags=["agents"])
@@ -95,83 +147,95 @@ app.include_router(tasks_router, prefix="/api/v1/tasks", tags=["tasks"])
 app.include_router(health_router, prefix="/api/v1/health", tags=["health"])
 
 # 🏠 Rutas principales
+
+# Parte fija de la respuesta raíz (se construye una sola vez)
+_ROOT_STATIC = {
+    "name": settings.PROJECT_NAME,
+    "version": settings.VERSION,
+    "description": settings.DESCRIPTION,
+    "status": "online",
+    "endpoints": {
+        "docs": "/docs",
+        "agents": "/api/v1/agents",
+        "tasks": "/api/v1/tasks", 
+        "health": "/api/v1/health",
+        "dashboard": f"http://{settings.DASHBOARD_HOST}:{settings.DASHBOARD_PORT}"
+    }
+}
+
 @app.get("/", response_model=Dict[str, Any])
 async def root():
     """Endpoint raíz con información del sistema"""
     return {
-        "name": settings.PROJECT_NAME,
-        "version": settings.VERSION,
-        "description": settings.DESCRIPTION,
-        "status": "online",
-        "timestamp": datetime.now().isoformat(),
-        "endpoints": {
-            "docs": "/docs",
-            "agents": "/api/v1/agents",
-            "tasks": "/api/v1/tasks", 
-            "health": "/api/v1/health",
-            "dashboard": f"http://{settings.DASHBOARD_HOST}:{settings.DASHBOARD_PORT}"
-        },
+        **_ROOT_STATIC,
+        "timestamp": iso_now(),
         "agent_count": len(agent_registry),
         "ai_provider": ai_service.provider
     }
 
+# 📋 Modelos Pydantic (validados por pydantic-core al parsear el cuerpo)
+class GenerateRequest(BaseModel):
+    prompt: str = Field(..., min_length=1)
+    model: Optional[str] = None
+    max_tokens: int = 1000
+    temperature: float = 0.7
+    system_prompt: Optional[str] = None
+
+class AnalyzeRequest(BaseModel):
+    text: str = Field(..., min_length=1)
+    type: str = "general"
+
+class CreateAgentRequest(BaseModel):
+    type: str = Field(..., min_length=1)
+    name: str = Field(..., min_length=1)
+    description: str = ""
+    config: Dict[str, Any] = Field(default_factory=dict)
+
 # 🤖 Rutas de IA directas
 @app.post("/api/v1/ai/generate", tags=["ai"])
-async def generate_text(
-    request: Dict[str, Any],
-    background_tasks: BackgroundTasks
-):
-    """Generar texto usando IA"""
-    try:
-        prompt = request.get("prompt")
-        if not prompt:
-            raise HTTPException(status_code=400, detail="Prompt es requerido")
-        
-        model = request.get("model")
-        max_tokens = request.get("max_tokens", 1000)
-        temperature = request.get("temperature", 0.7)
-        system_prompt = request.get("system_prompt")
-        
-        response = await ai_service.generate_text(
-            prompt=prompt,
-            model=model,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            system_prompt=system_prompt
-        )
-        
-        return {
+async def generate_text(request: GenerateRequest):
+    """Generar texto usando IA (asíncrono: responde 202 con un task_id)"""
+    # La generación se resuelve en segundo plano; las peticiones que esperan
+    # en la cola se envían juntas con generate_batch
+    task_id = await prompt_tasks.submit(
+        request.prompt,
+        model=request.model,
+        max_tokens=request.max_tokens,
+        temperature=request.temperature,
+        system_prompt=request.system_prompt
+    )
+    
+    return DefaultResponse(
+        status_code=202,
+        content={
             "success": True,
-            "response": response,
-            "metadata": {
-                "prompt_length": len(prompt),
-                "response_length": len(response),
-                "model": model or "default",
-                "provider": ai_service.provider
-            }
+            "task_id": task_id,
+            "status": "pending",
+            "result_url": f"/api/v1/ai/results/{task_id}"
         }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    )
+
+@app.get("/api/v1/ai/results/{task_id}", tags=["ai"])
+async def get_generation_result(task_id: str):
+    """Consultar el estado y el resultado de una generación"""
+    result = prompt_tasks.get_result(task_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Generación no encontrada o caducada")
+    
+    return {"success": result["status"] != "failed", **result}
 
 @app.post("/api/v1/ai/analyze", tags=["ai"])
-async def analyze_text(request: Dict[str, Any]):
+async def analyze_text(request: AnalyzeRequest):
     """Analizar texto con IA"""
     try:
-        text = request.get("text")
-        if not text:
-            raise HTTPException(status_code=400, detail="Texto es requerido")
-        
-        analysis_type = request.get("type", "general")
-        
-        result = await ai_service.analyze_text(text, analysis_type)
+        result = await ai_service.analyze_text(request.text, request.type)
         
         return {
             "success": True,
             "analysis": result,
             "metadata": {
-                "text_length": len(text),
-                "analysis_type": analysis_type,
+                "text_length": len(request.text),
+                "analysis_type": request.type,
                 "provider": ai_service.provider
             }
         }
@@ -198,9 +262,9 @@ async def get_system_stats():
     # Estadísticas del sistema
     system_stats = {
         "uptime": _get_uptime(),
-        "active_agents": len([a for a in agent_registry.values() if a.status.value != "stopped"]),
+        "active_agents": active_count(),
         "total_agents": len(agent_registry),
-        "timestamp": datetime.now().isoformat()
+        "timestamp": iso_now()
     }
     
     return {
@@ -214,26 +278,15 @@ async def get_system_stats():
 
 # 🔄 Rutas de gestión de agentes
 @app.post("/api/v1/system/create-agent", tags=["agents"])
-async def create_agent(request: Dict[str, Any]):
+async def create_agent(request: CreateAgentRequest):
     """Crear un nuevo agente"""
     try:
-        agent_type = request.get("type")
-        name = request.get("name")
-        description = request.get("description", "")
-        config = request.get("config", {})
-        
-        if not agent_type or not name:
-            raise HTTPException(
-                status_code=400, 
-                detail="Tipo y nombre del agente son requeridos"
-            )
-        
         # Crear agente usando factory
         agent = AgentFactory.create_agent(
-            agent_type=agent_type,
-            name=name,
-            description=description,
-            config=config
+            agent_type=request.type,
+            name=request.name,
+            description=request.description,
+            config=request.config
         )
         
         # Registrar agente
@@ -243,7 +296,7 @@ async def create_agent(request: Dict[str, Any]):
         return {
             "success": True,
             "agent_id": agent.id,
-            "message": f"Agente '{name}' creado exitosamente",
+            "message": f"Agente '{request.name}' creado exitosamente",
             "agent_info": agent.get_status()
         }
         
@@ -273,14 +326,19 @@ async def delete_agent(agent_id: str):
 @app.get("/api/v1/config", tags=["health"])
 async def get_config():
     """Obtener configuración actual del sistema"""
+    return _config_body(settings.VERSION, ai_service.provider, AgentFactory.get_available_types())
+
+@lru_cache(maxsize=4)
+def _config_body(version: str, ai_provider: str, available_agent_types: tuple) -> Dict[str, Any]:
+    """Respuesta de configuración (memoizada por versión, proveedor y tipos de agente)"""
     return {
         "success": True,
         "config": {
             "project_name": settings.PROJECT_NAME,
-            "version": settings.VERSION,
+            "version": version,
             "debug": settings.DEBUG,
-            "ai_provider": ai_service.provider,
-            "available_agent_types": AgentFactory.get_available_types(),
+            "ai_provider": ai_provider,
+            "available_agent_types": available_agent_types,
             "features": {
                 "ai_analysis": settings.OPENAI_API_KEY is not None or settings.USE_OLLAMA,
                 "file_upload": True,
@@ -303,29 +361,29 @@ async def clear_ai_cache():
 # 🚨 Manejadores de errores
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(
+    return DefaultResponse(
         status_code=exc.status_code,
         content={
             "success": False,
             "error": exc.detail,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
         }
     )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
-    return JSONResponse(
+    return DefaultResponse(
         status_code=500,
         content={
             "success": False,
             "error": "Error interno del servidor",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
         }
     )
 
 # 🔧 Funciones auxiliares
-async def initialize_default_agents():
-    """Inicializar agentes por defecto"""
+async def initialize_default_agents(ready: Optional[asyncio.Event] = None):
+    """Inicializar agentes por defecto (marca `ready` al terminar; si falla, relanza el error)"""
     try:
         # Crear agente procesador de documentos
         doc_agent = DocumentProcessorAgent(
@@ -339,7 +397,8 @@ async def initialize_default_agents():
             }
         )
         
-        register_agent(doc_agent.id, doc_agent)
+        # Cada worker crea el suyo: no se publica en el registro compartido
+        register_agent(doc_agent.id, doc_agent, shared=False)
         await doc_agent.start()
         
         print(f"✅ Agente por defecto creado: {doc_agent.name} (ID: {doc_agent.id})")
@@ -348,17 +407,27 @@ async def initialize_default_agents():
         # data_analyst = DataAnalystAgent(...)
         # customer_service = CustomerServiceAgent(...)
         
-    except Exception as e:
-        print(f"❌ Error inicializando agentes: {str(e)}")
+        if ready is not None:
+            ready.set()
+        
+    except Exception:
+        # La tarea queda fallida y /api/v1/health/ready lo informa
+        logger.exception("❌ Error inicializando agentes")
+        raise
 
 async def shutdown_agents():
-    """Detener todos los agentes"""
-    for agent_id, agent in agent_registry.items():
-        try:
-            await agent.stop()
+    """Detener todos los agentes (en paralelo)"""
+    agents = list(agent_registry.items())
+    results = await asyncio.gather(
+        *(agent.stop() for _, agent in agents),
+        return_exceptions=True
+    )
+    
+    for (agent_id, agent), result in zip(agents, results):
+        if isinstance(result, Exception):
+            print(f"❌ Error deteniendo agente {agent_id}: {str(result)}")
+        else:
             print(f"🛑 Agente detenido: {agent.name}")
-        except Exception as e:
-            print(f"❌ Error deteniendo agente {agent_id}: {str(e)}")
 
 def _get_uptime() -> float:
     """Calcular tiempo de actividad del sistema"""
@@ -367,14 +436,63 @@ def _get_uptime() -> float:
 
 # 🎯 Función para ejecutar la aplicación
 def run_server():
-    """Ejecutar servidor de desarrollo"""
-    uvicorn.run(
-        "src.api.main:app",
-        host=settings.API_HOST,
-        port=settings.API_PORT,
-        reload=settings.DEBUG,
-        log_level="info"
-    )
+    """Ejecutar servidor (un proceso con recarga en DEBUG, varios workers en producción)"""
+    # uvicorn instala la política de uvloop en cada proceso que arranca
+    loop = "uvloop" if uvloop is not None else "asyncio"
+    http = "httptools" if httptools is not None else "h11"
+    
+    if settings.DEBUG:
+        uvicorn.run(
+            "src.api.main:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            reload=True,
+            log_level="info",
+            loop=loop,
+            http=http
+        )
+        return
+    
+    workers = settings.API_WORKERS or 2 * (os.cpu_count() or 1) + 1
+    if workers > 1 and not settings.SHARED_AGENT_REGISTRY:
+        # Sin SHARED_AGENT_REGISTRY cada worker tiene su propio agent_registry:
+        # los agentes creados vía API solo existen en el proceso que los creó
+        print(f"⚠️ {workers} workers sin SHARED_AGENT_REGISTRY: el registro de agentes no se comparte")
+    
+    if BaseApplication is not None:
+        _GunicornApplication(app, {
+            "bind": f"{settings.API_HOST}:{settings.API_PORT}",
+            "workers": workers,
+            "worker_class": "uvicorn.workers.UvicornWorker",
+            "loglevel": "info"
+        }).run()
+    else:
+        # Sin gunicorn (p. ej. Windows): el gestor de procesos de uvicorn
+        uvicorn.run(
+            "src.api.main:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            workers=workers,
+            log_level="info",
+            loop=loop,
+            http=http
+        )
+
+if BaseApplication is not None:
+    class _GunicornApplication(BaseApplication):
+        """Aplicación gunicorn embebida con workers de uvicorn"""
+        
+        def __init__(self, application, options: Dict[str, Any]):
+            self.application = application
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return self.application
 
 # 🚀 Script principal
 if __name__ == "__main__":
@@ -0,0 +1,14 @@
+"""
+📤 Responses - Clase de respuesta JSON por defecto de la API
+"""
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson  # Serialización JSON en Rust para todas las respuestas
+except ImportError:
+    orjson = None
+
+# Clase de respuesta por defecto (orjson si está instalado)
+DefaultResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+__all__ = ["DefaultResponse"]
@@ -2,19 +2,48 @@
 🤖 Rutas de Agentes - Gestión completa de agentes de IA
 """
 import asyncio
-from typing import Dict, List, Any, Optional
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, BinaryIO, Dict, List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks, Depends, Response
 from pydantic import BaseModel
 
 # Imports locales
-from ...agents.base_agent import AgentFactory, TaskPriority
+from ...agents.base_agent import AgentFactory, BaseAgent, TaskPriority, msgspec
 from ...core.config import settings
 from ...core.registry import agent_registry
 
+try:
+    import aiofiles  # Escritura de archivos sin bloquear el event loop
+except ImportError:
+    aiofiles = None
+
 router = APIRouter()
 
+# Tamaño de bloque al guardar archivos subidos
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
+# Prioridad textual de la petición -> enum (constante, no se reconstruye por petición)
+_PRIORITY_MAP = MappingProxyType({
+    "low": TaskPriority.LOW,
+    "medium": TaskPriority.MEDIUM,
+    "high": TaskPriority.HIGH,
+    "critical": TaskPriority.CRITICAL
+})
+
+# Descripción de cada tipo de agente
+_TYPE_DESCRIPTIONS = MappingProxyType({
+    "document_processor": "Procesa y analiza documentos (PDF, Word, imágenes)",
+    "data_analyst": "Analiza datos y genera insights",
+    "customer_service": "Agente de atención al cliente",
+    "monitor": "Monitorea sistemas y procesos"
+})
+
 # 📋 Modelos Pydantic
 class TaskRequest(BaseModel):
     name: str
@@ -34,6 +63,15 @@ class AgentStatus(BaseModel):
     capabilities: List[str]
     metrics: Dict[str, Any]
 
+# 🔎 Dependencias
+
+def get_agent_or_404(agent_id: str) -> BaseAgent:
+    """Resolver el agente de la ruta con una sola búsqueda (404 si no existe)"""
+    agent = agent_registry.get(agent_id)
+    if agent is None:
+        raise HTTPException(status_code=404, detail="Agente no encontrado")
+    return agent
+
 # 🌟 Rutas principales de agentes
 
 @router.get("/", response_model=List[AgentStatus])
@@ -55,12 +93,8 @@ async def list_agents():
     return agents_info
 
 @router.get("/{agent_id}")
-async def get_agent(agent_id: str):
+async def get_agent(agent: BaseAgent = Depends(get_agent_or_404)):
     """Obtener información detallada de un agente específico"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
     status = agent.get_status()
     queue_status = agent.get_queue_status()
     
@@ -73,29 +107,36 @@ async def get_agent(agent_id: str):
         ]
     }
 
+@router.get("/{agent_id}/status")
+async def get_agent_status(agent: BaseAgent = Depends(get_agent_or_404)):
+    """Estado actual de un agente (serializado con msgspec si está disponible)"""
+    if msgspec is None:
+        return agent.get_status()
+    
+    return Response(
+        content=msgspec.json.encode(agent.get_status_struct()),
+        media_type="application/json"
+    )
+
 @router.get("/types/available")
 async def get_available_agent_types():
     """Obtener tipos de agentes disponibles"""
+    return _available_types_body(AgentFactory.get_available_types())
+
+@lru_cache(maxsize=4)
+def _available_types_body(available_types: tuple) -> Dict[str, Any]:
+    """Respuesta de tipos disponibles (se reconstruye solo si cambian los tipos)"""
     return {
         "success": True,
-        "available_types": AgentFactory.get_available_types(),
-        "descriptions": {
-            "document_processor": "Procesa y analiza documentos (PDF, Word, imágenes)",
-            "data_analyst": "Analiza datos y genera insights",
-            "customer_service": "Agente de atención al cliente",
-            "monitor": "Monitorea sistemas y procesos"
-        }
+        "available_types": available_types,
+        "descriptions": dict(_TYPE_DESCRIPTIONS)
     }
 
 # 🔄 Control de agentes
 
 @router.post("/{agent_id}/start")
-async def start_agent(agent_id: str):
+async def start_agent(agent: BaseAgent = Depends(get_agent_or_404)):
     """Iniciar un agente"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
     await agent.start()
     
     return {
@@ -105,12 +146,8 @@ async def start_agent(agent_id: str):
     }
 
 @router.post("/{agent_id}/stop")
-async def stop_agent(agent_id: str):
+async def stop_agent(agent: BaseAgent = Depends(get_agent_or_404)):
     """Detener un agente"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
     await agent.stop()
     
     return {
@@ -120,12 +157,8 @@ async def stop_agent(agent_id: str):
     }
 
 @router.post("/{agent_id}/restart")
-async def restart_agent(agent_id: str):
+async def restart_agent(agent: BaseAgent = Depends(get_agent_or_404)):
     """Reiniciar un agente"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
     await agent.restart()
     
     return {
@@ -137,22 +170,11 @@ async def restart_agent(agent_id: str):
 # 📝 Gestión de tareas
 
 @router.post("/{agent_id}/tasks", response_model=TaskResponse)
-async def add_task(agent_id: str, task: TaskRequest):
+async def add_task(task: TaskRequest, agent: BaseAgent = Depends(get_agent_or_404)):
     """Agregar una nueva tarea a un agente"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
     
     # Convertir prioridad string a enum
-    priority_map = {
-        "low": TaskPriority.LOW,
-        "medium": TaskPriority.MEDIUM,
-        "high": TaskPriority.HIGH,
-        "critical": TaskPriority.CRITICAL
-    }
-    
-    priority = priority_map.get(task.priority.lower(), TaskPriority.MEDIUM)
+    priority = _PRIORITY_MAP.get(task.priority.lower(), TaskPriority.MEDIUM)
     
     try:
         task_id = await agent.add_task(
@@ -171,16 +193,12 @@ async def add_task(agent_id: str, task: TaskRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{agent_id}/tasks")
-async def get_agent_tasks(agent_id: str):
+async def get_agent_tasks(agent: BaseAgent = Depends(get_agent_or_404)):
     """Obtener todas las tareas de un agente"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
     
     return {
         "success": True,
-        "agent_id": agent_id,
+        "agent_id": agent.id,
         "current_task": {
             "id": agent.current_task.id,
             "name": agent.current_task.name,
@@ -190,44 +208,41 @@ async def get_agent_tasks(agent_id: str):
     }
 
 @router.get("/{agent_id}/tasks/{task_id}")
-async def get_task_result(agent_id: str, task_id: str):
+async def get_task_result(task_id: str, agent: BaseAgent = Depends(get_agent_or_404)):
     """Obtener resultado de una tarea específica"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
+    task_info = agent.get_task_info(task_id)
+    if task_info is None:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
     
-    agent = agent_registry[agent_id]
-    result = await agent.get_task_result(task_id)
+    status = task_info["status"]
+    if status == "completed":
+        return {
+            "success": True,
+            "task_id": task_id,
+            "result": await agent.get_task_result(task_id),
+            "status": status
+        }
     
-    if result is None:
-        # Buscar en la cola para obtener información de la tarea
-        queue_status = agent.get_queue_status()
-        task_info = next((t for t in queue_status if t["id"] == task_id), None)
-        
-        if task_info:
-            return {
-                "success": True,
-                "task_id": task_id,
-                "status": task_info["status"],
-                "result": None,
-                "message": "Tarea aún no completada"
-            }
-        else:
-            raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    if status == "failed":
+        return {
+            "success": False,
+            "task_id": task_id,
+            "result": None,
+            "status": status,
+            "error": task_info["error"]
+        }
     
     return {
         "success": True,
         "task_id": task_id,
-        "result": result,
-        "status": "completed"
+        "status": status,
+        "result": None,
+        "message": "Tarea aún no completada"
     }
 
 @router.delete("/{agent_id}/tasks/{task_id}")
-async def cancel_task(agent_id: str, task_id: str):
+async def cancel_task(task_id: str, agent: BaseAgent = Depends(get_agent_or_404)):
     """Cancelar una tarea pendiente"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
     success = await agent.cancel_task(task_id)
     
     if not success:
@@ -245,18 +260,13 @@ async def cancel_task(agent_id: str, task_id: str):
 
 @router.post("/{agent_id}/upload-document")
 async def upload_document(
-    agent_id: str,
     background_tasks: BackgroundTasks,
+    agent: BaseAgent = Depends(get_agent_or_404),
     file: UploadFile = File(...),
     analysis_type: str = Form("extract_text"),
     auto_classify: bool = Form(True)
 ):
     """Subir y procesar un documento"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
-    
     # Verificar que sea un Document Processor
     if "extract_text_pdf" not in agent.get_capabilities():
         raise HTTPException(
@@ -269,23 +279,17 @@ async def upload_document(
         raise HTTPException(status_code=400, detail="Nombre de archivo requerido")
     
     # Guardar archivo
-    import os
-    from pathlib import Path
-    
     upload_dir = Path("uploads/documents")
     upload_dir.mkdir(parents=True, exist_ok=True)
     
     file_path = upload_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-    
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    file_size = await _save_upload(file, file_path)
     
     # Crear tarea de procesamiento
     task_data = {
         "file_path": str(file_path),
         "original_filename": file.filename,
-        "file_size": len(content),
+        "file_size": file_size,
         "auto_classify": auto_classify
     }
     
@@ -311,7 +315,7 @@ async def upload_document(
             "message": "Documento subido y procesamiento iniciado",
             "file_info": {
                 "filename": file.filename,
-                "size": len(content),
+                "size": file_size,
                 "path": str(file_path)
             },
             "tasks": {
@@ -328,16 +332,11 @@ async def upload_document(
 
 @router.post("/{agent_id}/batch-upload")
 async def batch_upload_documents(
-    agent_id: str,
+    agent: BaseAgent = Depends(get_agent_or_404),
     files: List[UploadFile] = File(...),
     max_files: int = Form(10)
 ):
     """Subir múltiples documentos para procesamiento por lotes"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
-    
     # Verificar que sea un Document Processor
     if "extract_text_pdf" not in agent.get_capabilities():
         raise HTTPException(
@@ -358,24 +357,23 @@ async def batch_upload_documents(
     upload_dir = Path("uploads/batch") / datetime.now().strftime('%Y%m%d_%H%M%S')
     upload_dir.mkdir(parents=True, exist_ok=True)
     
-    for file in files:
-        try:
-            if not file.filename:
-                continue
-                
-            file_path = upload_dir / file.filename
-            
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            
-            uploaded_files.append(str(file_path))
-            
-        except Exception as e:
+    # Todas las escrituras en paralelo (cada una a su propia ruta, aunque
+    # se repita el nombre); los fallos se recogen por archivo
+    named_files = [file for file in files if file.filename]
+    file_paths = _unique_upload_paths(upload_dir, [file.filename for file in named_files])
+    results = await asyncio.gather(
+        *(_save_upload(file, file_path) for file, file_path in zip(named_files, file_paths)),
+        return_exceptions=True
+    )
+    
+    for file, file_path, result in zip(named_files, file_paths, results):
+        if isinstance(result, BaseException):
             failed_uploads.append({
-                "filename": file.filename if file.filename else "unknown",
-                "error": str(e)
+                "filename": file.filename,
+                "error": str(result)
             })
+        else:
+            uploaded_files.append(str(file_path))
     
     if not uploaded_files:
         raise HTTPException(
@@ -409,12 +407,8 @@ async def batch_upload_documents(
 # 📊 Rutas de estadísticas específicas
 
 @router.get("/{agent_id}/stats")
-async def get_agent_stats(agent_id: str):
+async def get_agent_stats(agent: BaseAgent = Depends(get_agent_or_404)):
     """Obtener estadísticas detalladas de un agente"""
-    if agent_id not in agent_registry:
-        raise HTTPException(status_code=404, detail="Agente no encontrado")
-    
-    agent = agent_registry[agent_id]
     
     # Estadísticas base
     base_stats = agent.get_status()["metrics"]
@@ -427,7 +421,7 @@ async def get_agent_stats(agent_id: str):
     
     return {
         "success": True,
-        "agent_id": agent_id,
+        "agent_id": agent.id,
         "agent_name": agent.name,
         "stats": {
             **base_stats,
@@ -443,28 +437,61 @@ async def get_agent_stats(agent_id: str):
 
 # 🔧 Funciones auxiliares
 
-async def _add_classification_task(agent, extract_task_id: str, task_data: Dict):
+async def _add_classification_task(agent: BaseAgent, extract_task_id: str, task_data: Dict[str, Any]) -> None:
     """Agregar tarea de clasificación después de la extracción"""
-    # Esperar a que termine la extracción
-    max_wait = 60  # 1 minuto máximo
-    waited = 0
-    
-    while waited < max_wait:
-        result = await agent.get_task_result(extract_task_id)
-        if result is not None:
-            # La extracción terminó, agregar clasificación
-            await agent.add_task(
-                name="classify_document",
-                data={
-                    "text": result.get("text", ""),
-                    "file_name": task_data.get("original_filename", "")
-                },
-                priority=TaskPriority.MEDIUM
-            )
-            break
-        
-        await asyncio.sleep(1)
-        waited += 1
+    # Esperar a que termine la extracción (1 minuto máximo), sin sondeo
+    try:
+        result = await asyncio.wait_for(agent.wait_for_task(extract_task_id), timeout=60)
+    except asyncio.TimeoutError:
+        return
+    
+    if result is not None:
+        # La extracción terminó, agregar clasificación
+        await agent.add_task(
+            name="classify_document",
+            data={
+                "text": result.get("text", ""),
+                "file_name": task_data.get("original_filename", "")
+            },
+            priority=TaskPriority.MEDIUM
+        )
+
+def _unique_upload_paths(upload_dir: Path, filenames: List[str]) -> List[Path]:
+    """Rutas de destino sin repetir: los nombres duplicados reciben un sufijo _2, _3..."""
+    paths = []
+    taken = set()
+    for filename in filenames:
+        path = upload_dir / filename
+        counter = 1
+        # Comparación sin mayúsculas: en algunos sistemas de archivos es el mismo archivo
+        while str(path).lower() in taken:
+            counter += 1
+            path = upload_dir / f"{Path(filename).stem}_{counter}{Path(filename).suffix}"
+        taken.add(str(path).lower())
+        paths.append(path)
+    return paths
+
+async def _save_upload(file: UploadFile, file_path: Path) -> int:
+    """Guardar un archivo subido por bloques sin bloquear el event loop (devuelve el tamaño)"""
+    if aiofiles is not None:
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                await buffer.write(chunk)
+    else:
+        # Sin aiofiles: copia por bloques en el thread pool
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _copy_upload, file.file, file_path)
+    
+    return file_path.stat().st_size
+
+def _copy_upload(source: BinaryIO, file_path: Path) -> None:
+    """Copiar el archivo temporal de la subida al destino por bloques"""
+    source.seek(0)
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer, UPLOAD_CHUNK_SIZE)
 
 # 🎯 Exportar router
 __all__ = ["router"]
\ No newline at end of file
@@ -1,37 +1,60 @@
 """
 🔧 Health Routes - Estado y salud del sistema
 """
-from datetime import datetime
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from typing import Dict, Any
 
+from ...utils.clock import iso_now
+from ..responses import DefaultResponse
+
 router = APIRouter()
 
+# Partes fijas de las respuestas (endpoints de mayor tráfico: health checks)
+_HEALTH_STATIC = {
+    "status": "healthy",
+    "service": "Agentic AI Hub",
+    "version": "1.0.0"
+}
+
+_STATUS_STATIC = {
+    "status": "online",
+    "services": {
+        "api": "running",
+        "agents": "active",
+        "database": "connected"
+    },
+    "uptime": "running"
+}
+
+# Cuerpo de /ping ya serializado
+_PONG_BODY = b'{"message":"pong"}'
+
 @router.get("/")
 async def health_check():
     """Verificación básica de salud del sistema"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "service": "Agentic AI Hub",
-        "version": "1.0.0"
-    }
+    return {**_HEALTH_STATIC, "timestamp": iso_now()}
 
 @router.get("/status")
 async def system_status():
     """Estado detallado del sistema"""
-    return {
-        "status": "online",
-        "services": {
-            "api": "running",
-            "agents": "active",
-            "database": "connected"
-        },
-        "timestamp": datetime.now().isoformat(),
-        "uptime": "running"
-    }
+    return {**_STATUS_STATIC, "timestamp": iso_now()}
+
+@router.get("/ready")
+async def readiness(request: Request):
+    """Listo para recibir tráfico cuando los agentes por defecto están creados"""
+    startup = getattr(request.app.state, "agents_startup", None)
+    if startup is not None and startup.done() and not startup.cancelled() and startup.exception() is not None:
+        return DefaultResponse(
+            status_code=503,
+            content={"status": "failed", "error": str(startup.exception())}
+        )
+    
+    agents_ready = getattr(request.app.state, "agents_ready", None)
+    if agents_ready is None or not agents_ready.is_set():
+        return DefaultResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready"}
 
 @router.get("/ping")
 async def ping():
     """Ping simple para verificar conectividad"""
-    return {"message": "pong"}
\ No newline at end of file
+    return Response(content=_PONG_BODY, media_type="application/json")
\ No newline at end of file
@@ -1,10 +1,11 @@
 """
 📝 Tasks Routes - Gestión de tareas del sistema
 """
-from datetime import datetime
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any, List
 
+from ...utils.clock import iso_now
+
 router = APIRouter()
 
 @router.get("/")
@@ -14,7 +15,7 @@ async def list_tasks():
         "success": True,
         "tasks": [],
         "total": 0,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": iso_now()
     }
 
 @router.get("/stats")
@@ -28,5 +29,5 @@ async def task_statistics():
             "failed": 0,
             "pending": 0
         },
-        "timestamp": datetime.now().isoformat()
+        "timestamp": iso_now()
     }
\ No newline at end of file
@@ -2,7 +2,8 @@
 🔧 Configuración principal del sistema
 """
 import os
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
@@ -21,6 +22,12 @@ class Settings(BaseSettings):
     API_HOST: str = Field(default="127.0.0.1", env="API_HOST")
     API_PORT: int = Field(default=8000, env="API_PORT")
     DEBUG: bool = Field(default=True, env="DEBUG")
+    API_WORKERS: int = Field(default=0, env="API_WORKERS")  # 0 = 2 * núcleos + 1
+    # Orígenes permitidos por CORS fuera de DEBUG (en .env como lista JSON)
+    CORS_ORIGINS: List[str] = Field(
+        default=["http://127.0.0.1:8501", "http://localhost:8501"],
+        env="CORS_ORIGINS"
+    )
     
     # 🔐 Security
     SECRET_KEY: str = Field(
@@ -52,6 +59,7 @@ class Settings(BaseSettings):
     
     # 🔄 Task Queue (Celery)
     REDIS_URL: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
+    SHARED_AGENT_REGISTRY: bool = Field(default=False, env="SHARED_AGENT_REGISTRY")  # Registro en Redis entre workers
     
     # 📁 File Storage
     UPLOAD_DIR: str = Field(default="uploads", env="UPLOAD_DIR")
@@ -70,24 +78,31 @@ class Settings(BaseSettings):
 # 🌟 Instancia global de configuración
 settings = Settings()
 
-# 📂 Crear directorios necesarios
+# 📂 Crear directorios necesarios (se invoca desde el arranque de la API)
+@lru_cache(maxsize=1)
 def create_directories():
-    """Crear directorios necesarios si no existen"""
-    dirs = [
+    """Crear directorios necesarios si no existen (una vez por proceso)"""
+    # Solo directorios hoja: makedirs crea los padres (uploads/, data/) si faltan
+    dirs = (
         "logs",
-        "uploads", 
         "uploads/documents",
         "uploads/images",
-        "data",
         "data/processed",
         "data/models"
-    ]
+    )
     
+    # Un único stat por directorio existente; mkdir solo para los que faltan
     for dir_path in dirs:
-        os.makedirs(dir_path, exist_ok=True)
+        if not os.path.isdir(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
 
-# Crear directorios al importar
-create_directories()
+# 🧊 Colecciones constantes (inmutables y compartidas)
+DOCUMENT_PROCESSOR_SUPPORTED_FORMATS = frozenset({".pdf", ".docx", ".txt", ".csv"})
+DATA_ANALYST_CHART_TYPES = frozenset({"line", "bar", "scatter", "pie", "heatmap"})
+DASHBOARD_CHART_COLORS = (
+    "#FF6B6B", "#4ECDC4", "#45B7D1", 
+    "#96CEB4", "#FFEAA7", "#DDA0DD"
+)
 
 # 🎯 Configuraciones de agentes
 class AgentConfig:
@@ -98,7 +113,7 @@ class AgentConfig:
         "name": "DocumentProcessor",
         "description": "Procesa y extrae información de documentos",
         "max_file_size": 10 * 1024 * 1024,  # 10MB
-        "supported_formats": [".pdf", ".docx", ".txt", ".csv"],
+        "supported_formats": DOCUMENT_PROCESSOR_SUPPORTED_FORMATS,
         "max_processing_time": 300,  # 5 minutos
     }
     
@@ -107,7 +122,7 @@ class AgentConfig:
         "name": "DataAnalyst", 
         "description": "Analiza datos y genera insights",
         "max_data_points": 100000,
-        "chart_types": ["line", "bar", "scatter", "pie", "heatmap"],
+        "chart_types": DATA_ANALYST_CHART_TYPES,
         "analysis_timeout": 180,  # 3 minutos
     }
     
@@ -148,12 +163,10 @@ class DashboardConfig:
         "font": "sans serif"
     }
     
-    CHART_COLORS = [
-        "#FF6B6B", "#4ECDC4", "#45B7D1", 
-        "#96CEB4", "#FFEAA7", "#DDA0DD"
-    ]
+    CHART_COLORS = DASHBOARD_CHART_COLORS
 
-# 🚀 Funciones de utilidad para configuración
+# 🚀 Funciones de utilidad para configuración (la configuración no cambia en ejecución)
+@lru_cache(maxsize=1)
 def get_ai_provider():
     """Determinar qué proveedor de IA usar"""
     if settings.USE_OLLAMA:
@@ -163,20 +176,40 @@ def get_ai_provider():
     else:
         return "mock"  # Para desarrollo sin IA real
 
+@lru_cache(maxsize=1)
 def get_database_type():
     """Determinar tipo de base de datos"""
-    if "postgresql" in settings.DATABASE_URL.lower():
+    database_url = settings.DATABASE_URL.lower()
+    if database_url.startswith("postgresql"):
         return "postgresql"
-    elif "mysql" in settings.DATABASE_URL.lower():
+    elif database_url.startswith("mysql"):
         return "mysql"
     else:
         return "sqlite"
 
+# Valores derivados que se resuelven en el primer acceso (PEP 562)
+_LAZY_VALUES = {
+    "AI_PROVIDER": get_ai_provider,
+    "DATABASE_TYPE": get_database_type
+}
+
+def __getattr__(name):
+    """Resolver AI_PROVIDER y DATABASE_TYPE solo cuando se usan"""
+    if name in _LAZY_VALUES:
+        return _LAZY_VALUES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # 🎯 Exportar configuraciones
 __all__ = [
     "settings",
+    "create_directories",
     "AgentConfig", 
     "DashboardConfig",
+    "DOCUMENT_PROCESSOR_SUPPORTED_FORMATS",
+    "DATA_ANALYST_CHART_TYPES",
+    "DASHBOARD_CHART_COLORS",
     "get_ai_provider",
-    "get_database_type"
+    "get_database_type",
+    "AI_PROVIDER",
+    "DATABASE_TYPE"
 ]
\ No newline at end of file
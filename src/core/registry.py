@@ -1,30 +1,259 @@
 """
 🗄️ Registry - Registro global de agentes y servicios
+
+Con varios workers (gunicorn -w N) cada proceso tiene su propia memoria: los
+metadatos de los agentes se comparten en Redis y cada worker mantiene en su
+registro local las instancias vivas, reconstruidas a partir de esos metadatos.
+
+Dentro de un worker el registro es un único dict sin locks: todo el acceso
+ocurre en el hilo del event loop, cada operación es atómica entre dos `await`
+y no hay contención que repartir en shards.
 """
-from typing import Dict, Any
+import asyncio
+import json
+import uuid
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, Optional, Set
+from loguru import logger
+
+if TYPE_CHECKING:
+    from ..agents.base_agent import AgentStatus, BaseAgent
+
+try:
+    import redis.asyncio as aioredis  # Cliente asíncrono de Redis (antes aioredis)
+except ImportError:
+    aioredis = None
+
+# Claves y canal de Redis del registro compartido
+META_KEY_PREFIX = "agents:meta:"
+EVENTS_CHANNEL = "agents:events"
+
+class AgentRegistry(dict):
+    """
+    Registro de agentes vivos del proceso (agent_id -> agente)
+    
+    Se comporta como un dict para los llamadores existentes; si hay un
+    RegistryBackend conectado, las altas y bajas se propagan al resto de workers.
+    """
+    
+    def __init__(self) -> None:
+        super().__init__()
+        self.backend: Optional["RegistryBackend"] = None
+        # Agentes que solo existen en este proceso (p. ej. los agentes por defecto)
+        self.local_only: Set[str] = set()
+        # Agentes registrados que no están detenidos (se mantiene en cada alta,
+        # baja y cambio de estado en lugar de recorrer el registro)
+        self.active_count = 0
+    
+    def __setitem__(self, agent_id: str, agent: "BaseAgent") -> None:
+        previous = self.get(agent_id)
+        if previous is not None and _is_active(previous):
+            self.active_count -= 1
+        super().__setitem__(agent_id, agent)
+        if _is_active(agent):
+            self.active_count += 1
+    
+    def __delitem__(self, agent_id: str) -> None:
+        agent = self[agent_id]
+        super().__delitem__(agent_id)
+        if _is_active(agent):
+            self.active_count -= 1
+    
+    def pop(self, agent_id: str, *default: Any) -> Any:
+        if agent_id not in self:
+            return super().pop(agent_id, *default)
+        agent = self[agent_id]
+        del self[agent_id]
+        return agent
+    
+    def clear(self) -> None:
+        super().clear()
+        self.active_count = 0
+
+def _is_active(agent: "BaseAgent") -> bool:
+    """Un agente cuenta como activo mientras no esté detenido"""
+    return agent.status.value != "stopped"
+
+class RegistryBackend:
+    """Metadatos de agentes en Redis y eventos de alta/baja entre workers"""
+    
+    def __init__(self, registry: AgentRegistry, redis_url: str) -> None:
+        if aioredis is None:
+            raise RuntimeError("El registro compartido requiere el paquete redis")
+        
+        self.registry = registry
+        self.redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.worker_id = str(uuid.uuid4())
+        self._listener: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+    
+    async def connect(self) -> None:
+        """Cargar los agentes ya publicados y escuchar los eventos del resto de workers"""
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(EVENTS_CHANNEL)
+        
+        async for key in self.redis.scan_iter(match=f"{META_KEY_PREFIX}*"):
+            agent_id = key[len(META_KEY_PREFIX):]
+            if agent_id not in self.registry:
+                # Un hash inválido no debe impedir el arranque del worker
+                try:
+                    await self._rebuild(agent_id, await self.redis.hgetall(key))
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo reconstruir el agente {agent_id}: {e}")
+        
+        self._listener = asyncio.ensure_future(self._listen(pubsub))
+    
+    async def close(self) -> None:
+        """Dejar de escuchar eventos y cerrar la conexión"""
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self.redis.close()
+    
+    def publish_register(self, agent_id: str, agent: "BaseAgent") -> None:
+        """Publicar el alta de un agente (sin bloquear al llamador)"""
+        self._schedule(self._register(agent_id, _agent_metadata(agent)))
+    
+    def publish_unregister(self, agent_id: str) -> None:
+        """Publicar la baja de un agente (sin bloquear al llamador)"""
+        self._schedule(self._unregister(agent_id))
+    
+    def _schedule(self, coro: Awaitable[None]) -> None:
+        """Lanzar una escritura en Redis manteniendo una referencia hasta que termine"""
+        task = asyncio.ensure_future(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+    
+    async def _register(self, agent_id: str, metadata: Dict[str, str]) -> None:
+        await self.redis.hset(f"{META_KEY_PREFIX}{agent_id}", mapping=metadata)
+        await self.redis.publish(EVENTS_CHANNEL, json.dumps({
+            "action": "register", "agent_id": agent_id, "worker_id": self.worker_id
+        }))
+    
+    async def _unregister(self, agent_id: str) -> None:
+        await self.redis.delete(f"{META_KEY_PREFIX}{agent_id}")
+        await self.redis.publish(EVENTS_CHANNEL, json.dumps({
+            "action": "unregister", "agent_id": agent_id, "worker_id": self.worker_id
+        }))
+    
+    async def _listen(self, pubsub: Any) -> None:
+        """Aplicar en el registro local los eventos publicados por otros workers"""
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                
+                # Un evento erróneo se descarta sin detener la sincronización
+                try:
+                    await self._apply_event(json.loads(message["data"]))
+                except Exception as e:
+                    logger.warning(f"⚠️ Evento del registro ignorado ({message.get('data')!r}): {e}")
+        finally:
+            await pubsub.close()
+    
+    async def _apply_event(self, event: Dict[str, Any]) -> None:
+        """Aplicar un evento de alta/baja publicado por otro worker"""
+        if event["worker_id"] == self.worker_id:
+            return
+        
+        agent_id = event["agent_id"]
+        if event["action"] == "register" and agent_id not in self.registry:
+            metadata = await self.redis.hgetall(f"{META_KEY_PREFIX}{agent_id}")
+            await self._rebuild(agent_id, metadata)
+        elif event["action"] == "unregister":
+            agent = self.registry.pop(agent_id, None)
+            if agent is not None:
+                await agent.stop()
+    
+    async def _rebuild(self, agent_id: str, metadata: Dict[str, str]) -> None:
+        """Crear en este worker la instancia viva de un agente publicado por otro"""
+        if not metadata:
+            return
+        
+        from ..agents.base_agent import AgentFactory, _get_logger
+        
+        agent = AgentFactory.create_agent(
+            agent_type=metadata["type"],
+            name=metadata["name"],
+            description=metadata.get("description", ""),
+            config=json.loads(metadata.get("config") or "{}")
+        )
+        # Mismo ID en todos los workers
+        agent.id = agent_id
+        agent.logger = _get_logger().bind(agent=agent.name, agent_id=agent_id)
+        
+        self.registry[agent_id] = agent
+        await agent.start()
+
+def _agent_metadata(agent: "BaseAgent") -> Dict[str, str]:
+    """Metadatos serializables necesarios para reconstruir un agente"""
+    from ..agents.base_agent import AgentFactory
+    
+    agent_type = AgentFactory.get_type_of(type(agent))
+    return {
+        "type": agent_type or "",
+        "name": agent.name,
+        "description": agent.description,
+        "config": json.dumps(dict(agent.config), default=str)
+    }
 
 # 📋 Global agent registry
-agent_registry: Dict[str, Any] = {}
+agent_registry: AgentRegistry = AgentRegistry()
 
-def get_agent_registry() -> Dict[str, Any]:
+def get_agent_registry() -> AgentRegistry:
     """Obtener el registro de agentes"""
     return agent_registry
 
-def register_agent(agent_id: str, agent: Any) -> None:
-    """Registrar un agente"""
+def register_agent(agent_id: str, agent: "BaseAgent", shared: bool = True) -> None:
+    """Registrar un agente (shared=False lo mantiene solo en este proceso)"""
     agent_registry[agent_id] = agent
+    if not shared:
+        agent_registry.local_only.add(agent_id)
+    elif agent_registry.backend is not None:
+        agent_registry.backend.publish_register(agent_id, agent)
 
 def unregister_agent(agent_id: str) -> bool:
     """Desregistrar un agente"""
     if agent_id in agent_registry:
         del agent_registry[agent_id]
+        if agent_id in agent_registry.local_only:
+            agent_registry.local_only.discard(agent_id)
+        elif agent_registry.backend is not None:
+            agent_registry.backend.publish_unregister(agent_id)
         return True
     return False
 
-def get_agent(agent_id: str) -> Any:
+def get_agent(agent_id: str) -> Optional["BaseAgent"]:
     """Obtener un agente específico"""
     return agent_registry.get(agent_id)
 
+def active_count() -> int:
+    """Número de agentes registrados que no están detenidos (O(1))"""
+    return agent_registry.active_count
+
+def on_agent_status_change(agent: "BaseAgent", old: "AgentStatus", new: "AgentStatus") -> None:
+    """Actualizar el contador de activos cuando un agente entra o sale de "stopped" """
+    if agent_registry.get(agent.id) is not agent:
+        return
+    was_active = old.value != "stopped"
+    is_active = new.value != "stopped"
+    if was_active != is_active:
+        agent_registry.active_count += 1 if is_active else -1
+
 def clear_registry() -> None:
     """Limpiar todo el registro"""
-    agent_registry.clear()
\ No newline at end of file
+    agent_registry.clear()
+    agent_registry.local_only.clear()
+
+async def connect_registry(redis_url: str) -> None:
+    """Compartir el registro entre workers a través de Redis"""
+    backend = RegistryBackend(agent_registry, redis_url)
+    await backend.connect()
+    agent_registry.backend = backend
+
+async def disconnect_registry() -> None:
+    """Cerrar la conexión del registro compartido"""
+    backend, agent_registry.backend = agent_registry.backend, None
+    if backend is not None:
+        await backend.close()
\ No newline at end of file
@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 import time
 import re
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import hashlib
 import sys
 import os
@@ -20,6 +22,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(os.path.dirname(current_dir))
 sys.path.insert(0, root_dir)
 from extraction_utils import extract_enhanced_invoice_data
+import document_analysis as analysis
+from document_analysis import document_format, process_one
 
 # ================== CONFIGURACIÓN INICIAL ==================
 st.set_page_config(
@@ -137,382 +141,115 @@ def init_session_state():
         st.session_state.processed_docs = []
     if 'doc_history' not in st.session_state:
         st.session_state.doc_history = []
+    if 'type_counter' not in st.session_state:
+        # Documentos por tipo, actualizado en cada alta (add_processed_doc)
+        st.session_state.type_counter = Counter(
+            doc.get("tipo", "General") for doc in st.session_state.processed_docs
+        )
     if 'api_status' not in st.session_state:
         st.session_state.api_status = "checking"
     if 'last_results' not in st.session_state:
         st.session_state.last_results = []
 
+def add_processed_doc(doc):
+    """Añadir un documento al historial y a la cuenta por tipo"""
+    st.session_state.processed_docs.append(doc)
+    st.session_state.type_counter[doc.get("tipo", "General")] += 1
+
+@st.cache_resource
+def get_api_session():
+    """Sesión HTTP compartida entre reruns (mantiene viva la conexión con la API)"""
+    return requests.Session()
+
+@st.cache_data(ttl=5, show_spinner=False)
 def check_api_status():
-    """Verificar estado de la API"""
+    """Verificar estado de la API (como mucho una petición cada 5 segundos)"""
     try:
-        response = requests.get("http://localhost:8000/", timeout=3)
+        response = get_api_session().get("http://localhost:8000/", timeout=3)
         if response.status_code == 200:
             return "online"
         return "error"
     except:
         return "offline"
 
-def extract_document_content(file):
-    """Extraer contenido de diferentes tipos de archivo"""
-    content = ""
-    
+# Procesos para analizar varios documentos a la vez (lectura de PDF y regex usan CPU)
+DOC_POOL_WORKERS = min(os.cpu_count() or 1, 4)
+
+@st.cache_resource
+def get_process_pool():
+    """Pool de procesos compartido entre reruns de Streamlit"""
+    return ProcessPoolExecutor(max_workers=DOC_POOL_WORKERS)
+
+def reset_process_pool(pool):
+    """Descartar un pool roto (un worker murió); el siguiente lote crea uno nuevo"""
+    pool.shutdown(wait=False)
+    get_process_pool.clear()
+
+def submit_documents(files):
+    """Enviar cada archivo al pool de procesos (recreándolo si estaba roto)"""
+    pool = get_process_pool()
     try:
-        if file.type == "text/plain" or file.name.endswith('.txt'):
-            content = str(file.read(), "utf-8")
-            
-        elif file.type == "application/pdf" or file.name.endswith('.pdf'):
-            try:
-                import PyPDF2
-                from io import BytesIO
-                
-                pdf_bytes = BytesIO(file.read())
-                pdf_reader = PyPDF2.PdfReader(pdf_bytes)
-                
-                text_content = []
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text_content.append(page.extract_text())
-                
-                content = "\n".join(text_content)
-                
-            except ImportError:
-                st.error("PyPDF2 no está instalado. Ejecuta: pip install PyPDF2")
-                return None
-            except Exception as e:
-                st.error(f"Error procesando PDF: {str(e)}")
-                return None
-                
-        elif file.name.endswith(('.docx', '.doc')):
-            try:
-                import docx
-                from io import BytesIO
-                
-                docx_bytes = BytesIO(file.read())
-                doc = docx.Document(docx_bytes)
-                
-                paragraphs = []
-                for paragraph in doc.paragraphs:
-                    if paragraph.text.strip():
-                        paragraphs.append(paragraph.text.strip())
-                
-                content = "\n".join(paragraphs)
-                
-            except ImportError:
-                st.error("python-docx no está instalado. Ejecuta: pip install python-docx")
-                return None
-            except Exception as e:
-                st.error(f"Error procesando DOCX: {str(e)}")
-                return None
-        
-        file.seek(0)  # Resetear el puntero del archivo
-        
-    except Exception as e:
-        st.error(f"Error leyendo archivo: {str(e)}")
-        return None
-    
-    return content
+        return pool, [
+            pool.submit(process_one, file.name, file.getvalue(), file.type, file.size)
+            for file in files
+        ]
+    except BrokenProcessPool:
+        reset_process_pool(pool)
+        pool = get_process_pool()
+        return pool, [
+            pool.submit(process_one, file.name, file.getvalue(), file.type, file.size)
+            for file in files
+        ]
+
+# Resultados memorizados por contenido: los reruns y las resubidas del mismo
+# documento no vuelven a leerlo ni a analizarlo (el texto en minúsculas solo
+# se calcula dentro, cuando no hay acierto de caché).
 
+@st.cache_data(max_entries=64, show_spinner=False)
+def read_document_text(filename, data, mime_type=""):
+    """Texto de un documento (memorizado por nombre y bytes)"""
+    return analysis.read_document_text(filename, data, mime_type)
+
+@st.cache_data(max_entries=64, show_spinner=False)
 def classify_document(content, filename):
-    """Clasificar documento con sistema de puntuación mejorado"""
-    content_lower = content.lower()
-    
-    # Sistema de puntuación
-    doc_scores = {
-        "CV/Curriculum": 0,
-        "Factura": 0,
-        "Presupuesto": 0,
-        "Contrato": 0,
-        "Informe": 0,
-        "Carta/Email": 0,
-        "Manual/Guía": 0,
-        "Presentación": 0,
-        "General": 0
-    }
-    
-    # Keywords para cada tipo (optimizado)
-    keywords = {
-        "CV/Curriculum": [
-            "experiencia laboral", "experience", "formación", "education", 
-            "habilidades", "skills", "competencias", "idiomas", "languages",
-            "perfil profesional", "objetivo profesional", "linkedin",
-            "universidad", "grado", "máster", "bachelor", "degree"
-        ],
-        "Factura": [
-            "factura", "invoice", "total", "iva", "vat", "tax", 
-            "subtotal", "importe", "base imponible", "total a pagar",
-            "nº factura", "invoice number", "vencimiento", "due date"
-        ],
-        "Presupuesto": [
-            "presupuesto", "cotización", "quote", "quotation", "estimate",
-            "oferta", "propuesta", "validez", "condiciones", "plazo de entrega"
-        ],
-        "Contrato": [
-            "contrato", "contract", "acuerdo", "agreement", "cláusula",
-            "firmante", "partes", "obligaciones", "vigencia", "rescisión"
-        ],
-        "Informe": [
-            "informe", "report", "análisis", "conclusiones", "recomendaciones",
-            "resumen ejecutivo", "metodología", "resultados", "findings"
-        ],
-        "Carta/Email": [
-            "estimado", "dear", "atentamente", "saludos", "regards",
-            "cordialmente", "asunto", "subject", "adjunto", "attached"
-        ],
-        "Manual/Guía": [
-            "manual", "guía", "guide", "instrucciones", "paso a paso",
-            "instalación", "configuración", "setup", "requisitos"
-        ],
-        "Presentación": [
-            "diapositiva", "slide", "agenda", "objetivos", "outline",
-            "siguiente", "next", "resumen", "summary"
-        ]
-    }
-    
-    # Calcular puntuaciones
-    for doc_type, kw_list in keywords.items():
-        for keyword in kw_list:
-            if keyword in content_lower:
-                doc_scores[doc_type] += 2
-    
-    # Bonus por nombre de archivo
-    filename_lower = filename.lower()
-    filename_bonuses = {
-        "CV/Curriculum": ["cv", "curriculum", "resume"],
-        "Factura": ["factura", "invoice", "fact"],
-        "Presupuesto": ["presupuesto", "quote", "cotiz"],
-        "Contrato": ["contrato", "contract"],
-        "Informe": ["informe", "report"]
-    }
-    
-    for doc_type, patterns in filename_bonuses.items():
-        for pattern in patterns:
-            if pattern in filename_lower:
-                doc_scores[doc_type] += 10
-    
-    # Determinar tipo
-    max_score = max(doc_scores.values())
-    if max_score > 0:
-        doc_type = max(doc_scores, key=doc_scores.get)
-        confidence = min(100, (max_score / 20) * 100)
-    else:
-        doc_type = "General"
-        confidence = 0
-    
-    return doc_type, confidence
+    """Clasificación memorizada por contenido y nombre de archivo"""
+    return analysis.classify_document(content, filename)
 
+@st.cache_data(max_entries=64, show_spinner=False)
 def extract_invoice_data(content):
-    """Extraer datos específicos de facturas"""
-    data = {
-        "subtotal": "-",
-        "iva": "-",
-        "total": "-",
-        "fecha": "-",
-        "empresa": "-",
-        "numero_factura": "-",
-        "forma_pago": "-",
-        "vencimiento": "-"
-    }
-    
-    # Patrones para extracción
-    patterns = {
-        "subtotal": [
-            r'(?:base imponible|subtotal|base)[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)',
-            r'(?:importe neto)[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)'
-        ],
-        "iva": [
-            r'(?:iva|i\.v\.a\.)(?:\s*\d+\s*%)?[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)',
-            r'(\d+)\s*%\s*(?:de\s*)?IVA'
-        ],
-        "total": [
-            r'(?:total factura|total final)[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)',
-            r'(?:importe total|total a pagar)[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)',
-            r'(?:total)(?:\s+con\s*iva)?[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)'
-        ],
-        "fecha": [
-            r'(?:fecha|date|emitida)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{4})\b'
-        ],
-        "empresa": [
-            r'(?:cliente|razón social)[\s:]*([^\n\r]+)',
-            r'(?:empresa|compañía)[\s:]*([^\n\r]+)'
-        ],
-        "numero_factura": [
-            r'(?:factura|invoice)\s*(?:n[úuº]|#|number)[\s:]*([A-Z0-9\-/]+)',
-            r'(?:nº|no\.?|número)\s*(?:de\s*)?factura[\s:]*([A-Z0-9\-/]+)'
-        ],
-        "forma_pago": [
-            r'(?:forma de pago|payment method)[\s:]*([^\n\r]+)',
-            r'(?:método de pago|pago)[\s:]*([^\n\r]+)'
-        ],
-        "vencimiento": [
-            r'(?:vencimiento|due date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'(?:fecha de pago|payment date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-        ]
-    }
-    
-    # Extraer datos usando patrones
-    for field, pattern_list in patterns.items():
-        for pattern in pattern_list:
-            matches = re.findall(pattern, content, re.IGNORECASE | re.MULTILINE)
-            if matches:
-                if field in ["subtotal", "iva", "total"]:
-                    # Para montos, tomar el más grande si hay varios
-                    amounts = []
-                    for match in matches:
-                        clean = re.sub(r'[^\d.,]', '', str(match))
-                        clean = clean.replace(',', '.')
-                        try:
-                            amounts.append((float(clean), match))
-                        except:
-                            pass
-                    if amounts:
-                        data[field] = str(max(amounts, key=lambda x: x[0])[1])
-                else:
-                    data[field] = str(matches[0]).strip()[:100]
-                break
-    
-    return data
+    """Datos de factura memorizados por contenido"""
+    return analysis.extract_invoice_data(content)
 
+@st.cache_data(max_entries=64, show_spinner=False)
 def extract_cv_data(content):
-    """Extraer datos específicos de CVs"""
-    data = {
-        "nombre": "-",
-        "email": "-",
-        "telefono": "-",
-        "linkedin": "-",
-        "experiencia_años": "-",
-        "ultimo_cargo": "-",
-        "educacion": "-",
-        "habilidades": [],
-        "idiomas": []
-    }
-    
-    # Buscar nombre (primeras líneas)
-    lines = content.split('\n')
-    for line in lines[:10]:
-        line = line.strip()
-        if line and not any(x in line.lower() for x in ['curriculum', 'cv', 'resume']):
-            if re.match(r'^[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)+$', line):
-                data["nombre"] = line
-                break
-    
-    # Email
-    emails = re.findall(r'\b[\w\.\-]+@[\w\.\-]+\.\w+', content)
-    if emails:
-        data["email"] = emails[0]
-    
-    # Teléfono
-    phones = re.findall(r'(?:\+?\d{1,3}[\s\-]?)?\d{3,4}[\s\-]?\d{3,4}[\s\-]?\d{3,4}', content)
-    if phones:
-        data["telefono"] = phones[0]
-    
-    # LinkedIn
-    linkedin = re.findall(r'linkedin\.com/in/[\w\-]+', content, re.IGNORECASE)
-    if linkedin:
-        data["linkedin"] = linkedin[0]
-    
-    # Experiencia en años
-    exp_years = re.findall(r'(\d+)\s*(?:años?|years?)\s*(?:de\s*)?experiencia', content, re.IGNORECASE)
-    if exp_years:
-        data["experiencia_años"] = exp_years[0]
-    
-    # Último cargo
-    cargo_patterns = [
-        r'(?:cargo actual|current position|puesto actual)[\s:]*([^\n\r]+)',
-        r'(?:^|\n)([A-Z][^.!?\n]+(?:Manager|Director|Developer|Engineer|Analyst|Coordinator|Specialist))'
-    ]
-    for pattern in cargo_patterns:
-        cargos = re.findall(pattern, content, re.IGNORECASE | re.MULTILINE)
-        if cargos:
-            data["ultimo_cargo"] = cargos[0].strip()[:100]
-            break
-    
-    # Educación
-    edu_patterns = [
-        r'(?:universidad|university|college)[\s:]*([^\n\r]+)',
-        r'(?:grado|licenciatura|bachelor|master|máster)[\s:]*([^\n\r]+)'
-    ]
-    for pattern in edu_patterns:
-        edu = re.findall(pattern, content, re.IGNORECASE)
-        if edu:
-            data["educacion"] = edu[0].strip()[:100]
-            break
-    
-    # Habilidades
-    if "habilidades" in content.lower() or "skills" in content.lower():
-        skills_section = re.findall(r'(?:habilidades|skills)[\s:]*([^\n]+(?:\n[^\n]+){0,5})', content, re.IGNORECASE)
-        if skills_section:
-            skills_text = skills_section[0]
-            # Extraer habilidades comunes
-            tech_skills = ["python", "java", "javascript", "sql", "excel", "powerbi", "tableau", 
-                          "aws", "azure", "docker", "kubernetes", "git", "agile", "scrum"]
-            found_skills = []
-            for skill in tech_skills:
-                if skill in skills_text.lower():
-                    found_skills.append(skill.upper())
-            data["habilidades"] = found_skills[:10]  # Limitar a 10 habilidades
-    
-    # Idiomas
-    idiomas_patterns = [
-        r'(?:inglés|english)[\s:]*(?:[\w\s]+)?(?:C1|C2|B1|B2|avanzado|intermedio|nativo)',
-        r'(?:español|spanish)[\s:]*(?:[\w\s]+)?(?:nativo|native|C1|C2)',
-        r'(?:francés|french|alemán|german|italiano|italian)[\s:]*(?:[\w\s]+)?(?:A1|A2|B1|B2|C1|C2)'
-    ]
-    idiomas_found = []
-    for pattern in idiomas_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE)
-        idiomas_found.extend(matches)
-    data["idiomas"] = idiomas_found[:5]  # Limitar a 5 idiomas
-    
-    return data
+    """Datos de CV memorizados por contenido"""
+    return analysis.extract_cv_data(content)
 
+@st.cache_data(max_entries=64, show_spinner=False)
 def extract_contract_data(content):
-    """Extraer datos específicos de contratos"""
-    data = {
-        "tipo_contrato": "-",
-        "partes": [],
-        "fecha_inicio": "-",
-        "fecha_fin": "-",
-        "duracion": "-",
-        "valor": "-",
-        "clausulas_principales": []
-    }
-    
-    # Tipo de contrato
-    tipos = ["laboral", "servicios", "arrendamiento", "compraventa", "confidencialidad", "prestación"]
-    for tipo in tipos:
-        if tipo in content.lower():
-            data["tipo_contrato"] = tipo.capitalize()
-            break
-    
-    # Partes del contrato
-    partes_pattern = r'(?:entre|between|partes|parties)[\s:]*([^\n,]+)(?:\s*y\s*|\s*and\s*)([^\n,]+)'
-    partes = re.findall(partes_pattern, content, re.IGNORECASE)
-    if partes:
-        data["partes"] = list(partes[0])
-    
-    # Fechas
-    fechas = re.findall(r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{4})\b', content)
-    if len(fechas) >= 1:
-        data["fecha_inicio"] = fechas[0]
-    if len(fechas) >= 2:
-        data["fecha_fin"] = fechas[1]
-    
-    # Duración
-    duracion = re.findall(r'(\d+)\s*(?:meses|months|años|years)', content, re.IGNORECASE)
-    if duracion:
-        data["duracion"] = duracion[0]
-    
-    # Valor del contrato
-    valores = re.findall(r'[€$£]\s*[\d.,]+(?:\.\d{2})?', content)
-    if valores:
-        data["valor"] = valores[0]
+    """Datos de contrato memorizados por contenido"""
+    return analysis.extract_contract_data(content)
+
+def extract_document_content(file):
+    """Extraer contenido de diferentes tipos de archivo"""
+    doc_format = document_format(file.name, file.type)
     
-    # Cláusulas principales
-    clausulas = re.findall(r'(?:cláusula|clause)\s*\d+[\s:]*([^\n]+)', content, re.IGNORECASE)
-    data["clausulas_principales"] = clausulas[:5]  # Primeras 5 cláusulas
+    try:
+        content = read_document_text(file.name, file.getvalue(), file.type)
+    except ImportError:
+        if doc_format == "pdf":
+            st.error("PyPDF2 no está instalado. Ejecuta: pip install PyPDF2")
+        else:
+            st.error("python-docx no está instalado. Ejecuta: pip install python-docx")
+        return None
+    except Exception as e:
+        if doc_format in ("pdf", "docx"):
+            st.error(f"Error procesando {doc_format.upper()}: {str(e)}")
+        else:
+            st.error(f"Error leyendo archivo: {str(e)}")
+        return None
     
-    return data
+    return content
 
 # ================== INICIALIZACIÓN ==================
 init_session_state()
@@ -557,8 +294,7 @@ with st.sidebar:
         st.metric("📄 Documentos Procesados", total_docs)
         
         # Tipos de documentos
-        doc_types = Counter([doc.get("tipo", "General") for doc in st.session_state.processed_docs])
-        for doc_type, count in doc_types.most_common(3):
+        for doc_type, count in st.session_state.type_counter.most_common(3):
             st.metric(f"🏷️ {doc_type}", count)
     else:
         st.info("No hay documentos procesados aún")
@@ -570,6 +306,7 @@ with st.sidebar:
     if st.button("🗑️ Limpiar historial", use_container_width=True):
         st.session_state.processed_docs = []
         st.session_state.doc_history = []
+        st.session_state.type_counter = Counter()
         st.rerun()
     
     if st.button("💾 Exportar datos", use_container_width=True):
@@ -672,7 +409,7 @@ with tab1:
         st.markdown("### 🎯 Distribución por Tipo")
         
         if st.session_state.processed_docs:
-            doc_types = Counter([doc.get("tipo", "General") for doc in st.session_state.processed_docs])
+            doc_types = st.session_state.type_counter
             
             fig = go.Figure(data=[go.Pie(
                 labels=list(doc_types.keys()),
@@ -856,7 +593,7 @@ with tab2:
                                     "palabras": word_count,
                                     "timestamp": datetime.now().isoformat()
                                 }
-                                st.session_state.processed_docs.append(doc_record)
+                                add_processed_doc(doc_record)
                             
                             # Mostrar extracto del contenido
                             with st.expander("📄 Ver contenido extraído"):
@@ -897,35 +634,33 @@ with tab2:
                 status_text = st.empty()
                 results = []
                 
-                for i, file in enumerate(uploaded_files):
+                # Cada archivo se procesa en un proceso del pool
+                pool, futures = submit_documents(uploaded_files)
+                
+                for i, (file, future) in enumerate(zip(uploaded_files, futures)):
                     status_text.text(f"Procesando {file.name}...")
-                    progress_bar.progress((i + 1) / len(uploaded_files))
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        # Un worker murió (p. ej. PDF que agota la memoria): los
+                        # archivos pendientes de este lote fallan y el pool se recrea
+                        reset_process_pool(pool)
+                        st.error(f"Error procesando {file.name}: el proceso de análisis terminó inesperadamente")
+                        continue
+                    except Exception as e:
+                        st.error(f"Error procesando {file.name}: {str(e)}")
+                        continue
+                    finally:
+                        progress_bar.progress((i + 1) / len(uploaded_files))
                     
-                    content = extract_document_content(file)
-                    if content:
-                        doc_type, confidence = classify_document(content, file.name)
-                        
-                        result = {
-                            "archivo": file.name,
-                            "tipo": doc_type,
-                            "confianza": f"{confidence:.0f}%",
-                            "palabras": len(content.split()),
-                            "tamaño": file.size
-                        }
-                        
-                        # Extraer datos específicos según tipo
-                        if doc_type == "Factura":
-                            invoice_data = extract_invoice_data(content)
-                            result.update(invoice_data)
-                        elif doc_type == "CV/Curriculum":
-                            cv_data = extract_cv_data(content)
-                            result.update(cv_data)
-                        elif doc_type == "Contrato":
-                            contract_data = extract_contract_data(content)
-                            result.update(contract_data)
-                        
-                        results.append(result)
-                        st.session_state.processed_docs.append(result)
+                    if result is None:
+                        continue
+                    if "error" in result:
+                        st.error(f"Error procesando {file.name}: {result['error']}")
+                        continue
+                    
+                    results.append(result)
+                    add_processed_doc(result)
                 
                 status_text.text("✅ Procesamiento completado!")
                 progress_bar.progress(1.0)
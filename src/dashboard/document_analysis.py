@@ -0,0 +1,637 @@
+"""
+🧾 Análisis de Documentos
+Extracción de texto, clasificación y extracción de datos sin dependencias de
+Streamlit, para poder ejecutarse en procesos del pool de procesamiento
+"""
+
+import re
+from io import BytesIO
+from itertools import islice
+
+try:
+    import ahocorasick  # Búsqueda de todas las palabras clave en una sola pasada
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan  # Prefiltro multipatrón de las expresiones de extracción
+except ImportError:
+    hyperscan = None
+
+try:
+    import pypdfium2 as pdfium  # Extracción de PDF en código nativo (PDFium)
+except ImportError:
+    pdfium = None
+
+# ================== EXTRACCIÓN DE TEXTO ==================
+
+def iter_pdf_pages(pdf_reader):
+    """Texto de las páginas de un PDF, una a una"""
+    for page in pdf_reader.pages:
+        yield page.extract_text() or ""
+
+def iter_pdfium_pages(pdf):
+    """Texto de las páginas de un PdfDocument de pypdfium2, una a una"""
+    for page in pdf:
+        textpage = page.get_textpage()
+        try:
+            yield textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+
+def document_format(filename, mime_type=""):
+    """Formato del documento ("txt", "pdf", "docx") o None si no está soportado"""
+    if mime_type == "text/plain" or filename.endswith('.txt'):
+        return "txt"
+    if mime_type == "application/pdf" or filename.endswith('.pdf'):
+        return "pdf"
+    if filename.endswith(('.docx', '.doc')):
+        return "docx"
+    return None
+
+def read_document_text(filename, data, mime_type=""):
+    """Texto de un documento a partir de sus bytes
+    
+    Lanza ImportError si falta la librería del formato y la excepción original
+    si el archivo no se puede leer.
+    """
+    doc_format = document_format(filename, mime_type)
+    
+    if doc_format == "txt":
+        return str(data, "utf-8")
+    
+    if doc_format == "pdf":
+        if pdfium is not None:
+            pdf = pdfium.PdfDocument(data)
+            try:
+                return "\n".join(iter_pdfium_pages(pdf))
+            finally:
+                pdf.close()
+        
+        import PyPDF2
+        
+        pdf_reader = PyPDF2.PdfReader(BytesIO(data))
+        return "\n".join(iter_pdf_pages(pdf_reader))
+    
+    if doc_format == "docx":
+        import docx
+        
+        doc = docx.Document(BytesIO(data))
+        paragraphs = []
+        for paragraph in doc.paragraphs:
+            if paragraph.text.strip():
+                paragraphs.append(paragraph.text.strip())
+        return "\n".join(paragraphs)
+    
+    return ""
+
+# ================== CLASIFICACIÓN ==================
+
+# Palabras clave por tipo de documento (+2 por cada una presente en el contenido)
+CLASSIFY_KEYWORDS = {
+    "CV/Curriculum": [
+        "experiencia laboral", "experience", "formación", "education", 
+        "habilidades", "skills", "competencias", "idiomas", "languages",
+        "perfil profesional", "objetivo profesional", "linkedin",
+        "universidad", "grado", "máster", "bachelor", "degree"
+    ],
+    "Factura": [
+        "factura", "invoice", "total", "iva", "vat", "tax", 
+        "subtotal", "importe", "base imponible", "total a pagar",
+        "nº factura", "invoice number", "vencimiento", "due date"
+    ],
+    "Presupuesto": [
+        "presupuesto", "cotización", "quote", "quotation", "estimate",
+        "oferta", "propuesta", "validez", "condiciones", "plazo de entrega"
+    ],
+    "Contrato": [
+        "contrato", "contract", "acuerdo", "agreement", "cláusula",
+        "firmante", "partes", "obligaciones", "vigencia", "rescisión"
+    ],
+    "Informe": [
+        "informe", "report", "análisis", "conclusiones", "recomendaciones",
+        "resumen ejecutivo", "metodología", "resultados", "findings"
+    ],
+    "Carta/Email": [
+        "estimado", "dear", "atentamente", "saludos", "regards",
+        "cordialmente", "asunto", "subject", "adjunto", "attached"
+    ],
+    "Manual/Guía": [
+        "manual", "guía", "guide", "instrucciones", "paso a paso",
+        "instalación", "configuración", "setup", "requisitos"
+    ],
+    "Presentación": [
+        "diapositiva", "slide", "agenda", "objetivos", "outline",
+        "siguiente", "next", "resumen", "summary"
+    ]
+}
+
+# Bonus por nombre de archivo (+10 por cada patrón presente)
+FILENAME_BONUSES = {
+    "CV/Curriculum": ["cv", "curriculum", "resume"],
+    "Factura": ["factura", "invoice", "fact"],
+    "Presupuesto": ["presupuesto", "quote", "cotiz"],
+    "Contrato": ["contrato", "contract"],
+    "Informe": ["informe", "report"]
+}
+
+def build_keyword_automaton(groups, weight):
+    """Autómata Aho-Corasick palabra -> (tipo, peso); None sin pyahocorasick"""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for doc_type, words in groups.items():
+        for word in words:
+            automaton.add_word(word, (word, doc_type, weight))
+    automaton.make_automaton()
+    return automaton
+
+# Construidos una vez al importar; los reruns de Streamlit los reutilizan
+KEYWORD_AUTOMATON = build_keyword_automaton(CLASSIFY_KEYWORDS, 2)
+FILENAME_AUTOMATON = build_keyword_automaton(FILENAME_BONUSES, 10)
+
+# Puntuación con la que la clasificación deja de leer el documento
+# (la confianza ya es del 100% a partir de CLASSIFY_CONFIDENT_SCORE)
+CLASSIFY_CONFIDENT_SCORE = 20
+CLASSIFY_EARLY_EXIT = 30
+
+# Tamaño aproximado de los trozos en que se recorre un texto ya extraído
+CLASSIFY_CHUNK_CHARS = 64 * 1024
+
+def iter_text_chunks(text, size=CLASSIFY_CHUNK_CHARS):
+    """Trozos de unos `size` caracteres, cortados justo después de un salto de línea
+    
+    Ninguna palabra clave contiene saltos de línea, así que ninguna queda partida.
+    """
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start + size)
+        end = len(text) if end == -1 else end + 1
+        yield text[start:end]
+        start = end
+
+def score_keywords(text, groups, automaton, weight, doc_scores, seen=None):
+    """Sumar a doc_scores el peso de cada palabra clave presente en el texto
+    
+    Cada palabra clave puntúa una vez aunque se repita; `seen` guarda las ya
+    puntuadas cuando el texto llega en varios trozos.
+    """
+    if automaton is not None:
+        # Una sola pasada por el texto
+        hits = {hit for _, hit in automaton.iter(text)}
+    else:
+        hits = {
+            (word, doc_type, weight)
+            for doc_type, words in groups.items() for word in words if word in text
+        }
+    
+    if seen is not None:
+        hits -= seen
+        seen |= hits
+    
+    for word, doc_type, word_weight in hits:
+        doc_scores[doc_type] += word_weight
+
+def classify_document(content, filename, content_lower=None):
+    """Clasificar documento con sistema de puntuación mejorado
+    
+    `content` puede ser el texto completo o un iterable de trozos (p. ej.
+    iter_pdf_pages); la lectura se detiene en cuanto un tipo alcanza
+    CLASSIFY_EARLY_EXIT puntos. Si el llamador ya tiene el texto en
+    minúsculas lo pasa en `content_lower` y no se vuelve a convertir.
+    """
+    if content_lower is not None:
+        chunks = iter_text_chunks(content_lower)
+    elif isinstance(content, str):
+        chunks = iter_text_chunks(content)
+    else:
+        chunks = content
+    
+    # Sistema de puntuación
+    doc_scores = {
+        "CV/Curriculum": 0,
+        "Factura": 0,
+        "Presupuesto": 0,
+        "Contrato": 0,
+        "Informe": 0,
+        "Carta/Email": 0,
+        "Manual/Guía": 0,
+        "Presentación": 0,
+        "General": 0
+    }
+    
+    # Bonus por nombre de archivo
+    score_keywords(filename.lower(), FILENAME_BONUSES, FILENAME_AUTOMATON, 10, doc_scores)
+    
+    # Calcular puntuaciones trozo a trozo hasta que el tipo está claro
+    seen = set()
+    for chunk in chunks:
+        if max(doc_scores.values()) >= CLASSIFY_EARLY_EXIT:
+            break
+        if content_lower is None:
+            chunk = chunk.lower()
+        score_keywords(chunk, CLASSIFY_KEYWORDS, KEYWORD_AUTOMATON, 2, doc_scores, seen)
+    
+    # Determinar tipo
+    max_score = max(doc_scores.values())
+    if max_score > 0:
+        doc_type = max(doc_scores, key=doc_scores.get)
+        confidence = min(100, (max_score / CLASSIFY_CONFIDENT_SCORE) * 100)
+    else:
+        doc_type = "General"
+        confidence = 0
+    
+    return doc_type, confidence
+
+# ================== EXTRACCIÓN DE DATOS ==================
+
+# Patrones de extracción de facturas
+INVOICE_PATTERN_SOURCES = {
+    "subtotal": [
+        r'(?:base imponible|subtotal|base)[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)',
+        r'(?:importe neto)[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)'
+    ],
+    "iva": [
+        r'(?:iva|i\.v\.a\.)(?:\s*\d+\s*%)?[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)',
+        r'(\d+)\s*%\s*(?:de\s*)?IVA'
+    ],
+    "total": [
+        r'(?:total factura|total final)[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)',
+        r'(?:importe total|total a pagar)[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)',
+        r'(?:total)(?:\s+con\s*iva)?[\s:]*([€$£]?\s*[\d.,]+(?:\.\d{2})?)'
+    ],
+    "fecha": [
+        r'(?:fecha|date|emitida)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{4})\b'
+    ],
+    "empresa": [
+        r'(?:cliente|razón social)[\s:]*([^\n\r]+)',
+        r'(?:empresa|compañía)[\s:]*([^\n\r]+)'
+    ],
+    "numero_factura": [
+        r'(?:factura|invoice)\s*(?:n[úuº]|#|number)[\s:]*([A-Z0-9\-/]+)',
+        r'(?:nº|no\.?|número)\s*(?:de\s*)?factura[\s:]*([A-Z0-9\-/]+)'
+    ],
+    "forma_pago": [
+        r'(?:forma de pago|payment method)[\s:]*([^\n\r]+)',
+        r'(?:método de pago|pago)[\s:]*([^\n\r]+)'
+    ],
+    "vencimiento": [
+        r'(?:vencimiento|due date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        r'(?:fecha de pago|payment date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
+    ]
+}
+
+# Compilados una vez al importar (los reruns de Streamlit los reutilizan)
+INVOICE_PATTERNS = {
+    field: tuple(re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in pattern_list)
+    for field, pattern_list in INVOICE_PATTERN_SOURCES.items()
+}
+
+# Caracteres que no forman parte de un importe
+AMOUNT_CLEAN_RE = re.compile(r'[^\d.,]')
+
+# Campos de importe: necesitan todas las coincidencias para quedarse con la mayor
+AMOUNT_FIELDS = frozenset({"subtotal", "iva", "total"})
+
+def may_match(pattern, candidates):
+    """False solo si el prefiltro Hyperscan descartó el patrón para este documento"""
+    return candidates is None or pattern in candidates
+
+def first_match(pattern, content, candidates=None):
+    """Primer elemento que devolvería pattern.findall(content), o None
+    
+    La búsqueda se detiene en la primera coincidencia en lugar de recorrer
+    todo el documento.
+    """
+    if not may_match(pattern, candidates):
+        return None
+    match = pattern.search(content)
+    if match is None:
+        return None
+    if pattern.groups == 0:
+        return match.group(0)
+    if pattern.groups == 1:
+        return match.group(1) or ""
+    return tuple(group or "" for group in match.groups())
+
+def extract_invoice_data(content):
+    """Extraer datos específicos de facturas"""
+    data = {
+        "subtotal": "-",
+        "iva": "-",
+        "total": "-",
+        "fecha": "-",
+        "empresa": "-",
+        "numero_factura": "-",
+        "forma_pago": "-",
+        "vencimiento": "-"
+    }
+    
+    # Patrones que pueden aparecer en el documento (una pasada de Hyperscan)
+    candidates = candidate_patterns(content)
+    
+    # Extraer datos usando patrones
+    for field, pattern_list in INVOICE_PATTERNS.items():
+        for pattern in pattern_list:
+            if not may_match(pattern, candidates):
+                continue
+            if field in AMOUNT_FIELDS:
+                matches = pattern.findall(content)
+                if matches:
+                    # Para montos, tomar el más grande si hay varios
+                    amounts = []
+                    for match in matches:
+                        clean = AMOUNT_CLEAN_RE.sub('', str(match))
+                        clean = clean.replace(',', '.')
+                        try:
+                            amounts.append((float(clean), match))
+                        except:
+                            pass
+                    if amounts:
+                        data[field] = str(max(amounts, key=lambda x: x[0])[1])
+                    break
+            else:
+                # El resto de campos solo usa la primera coincidencia
+                match = first_match(pattern, content)
+                if match is not None:
+                    data[field] = str(match).strip()[:100]
+                    break
+    
+    return data
+
+# Patrones de extracción de CVs
+CV_NAME_RE = re.compile(r'^[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)+$')
+CV_EMAIL_RE = re.compile(r'\b[\w\.\-]+@[\w\.\-]+\.\w+')
+CV_PHONE_RE = re.compile(r'(?:\+?\d{1,3}[\s\-]?)?\d{3,4}[\s\-]?\d{3,4}[\s\-]?\d{3,4}')
+CV_LINKEDIN_RE = re.compile(r'linkedin\.com/in/[\w\-]+', re.IGNORECASE)
+CV_EXPERIENCE_RE = re.compile(r'(\d+)\s*(?:años?|years?)\s*(?:de\s*)?experiencia', re.IGNORECASE)
+CV_CARGO_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in (
+    r'(?:cargo actual|current position|puesto actual)[\s:]*([^\n\r]+)',
+    r'(?:^|\n)([A-Z][^.!?\n]+(?:Manager|Director|Developer|Engineer|Analyst|Coordinator|Specialist))'
+))
+CV_EDU_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:universidad|university|college)[\s:]*([^\n\r]+)',
+    r'(?:grado|licenciatura|bachelor|master|máster)[\s:]*([^\n\r]+)'
+))
+CV_SKILLS_RE = re.compile(r'(?:habilidades|skills)[\s:]*([^\n]+(?:\n[^\n]+){0,5})', re.IGNORECASE)
+CV_IDIOMAS_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:inglés|english)[\s:]*(?:[\w\s]+)?(?:C1|C2|B1|B2|avanzado|intermedio|nativo)',
+    r'(?:español|spanish)[\s:]*(?:[\w\s]+)?(?:nativo|native|C1|C2)',
+    r'(?:francés|french|alemán|german|italiano|italian)[\s:]*(?:[\w\s]+)?(?:A1|A2|B1|B2|C1|C2)'
+))
+
+def head_lines(content, count):
+    """Primeras `count` líneas del texto sin partir el documento entero"""
+    end = -1
+    for _ in range(count):
+        end = content.find('\n', end + 1)
+        if end < 0:
+            return content.split('\n')
+    return content[:end].split('\n')
+
+def extract_cv_data(content, content_lower=None):
+    """Extraer datos específicos de CVs (content_lower: content.lower() si ya se tiene)"""
+    data = {
+        "nombre": "-",
+        "email": "-",
+        "telefono": "-",
+        "linkedin": "-",
+        "experiencia_años": "-",
+        "ultimo_cargo": "-",
+        "educacion": "-",
+        "habilidades": [],
+        "idiomas": []
+    }
+    
+    # Patrones que pueden aparecer en el documento (una pasada de Hyperscan)
+    candidates = candidate_patterns(content)
+    
+    # Buscar nombre (primeras líneas)
+    for line in head_lines(content, 10):
+        line = line.strip()
+        if line and not any(x in line.lower() for x in ['curriculum', 'cv', 'resume']):
+            if CV_NAME_RE.match(line):
+                data["nombre"] = line
+                break
+    
+    # Email
+    emails = first_match(CV_EMAIL_RE, content, candidates)
+    if emails is not None:
+        data["email"] = emails
+    
+    # Teléfono
+    phones = first_match(CV_PHONE_RE, content, candidates)
+    if phones is not None:
+        data["telefono"] = phones
+    
+    # LinkedIn
+    linkedin = first_match(CV_LINKEDIN_RE, content, candidates)
+    if linkedin is not None:
+        data["linkedin"] = linkedin
+    
+    # Experiencia en años
+    exp_years = first_match(CV_EXPERIENCE_RE, content, candidates)
+    if exp_years is not None:
+        data["experiencia_años"] = exp_years
+    
+    # Último cargo
+    for pattern in CV_CARGO_PATTERNS:
+        cargo = first_match(pattern, content, candidates)
+        if cargo is not None:
+            data["ultimo_cargo"] = cargo.strip()[:100]
+            break
+    
+    # Educación
+    for pattern in CV_EDU_PATTERNS:
+        edu = first_match(pattern, content, candidates)
+        if edu is not None:
+            data["educacion"] = edu.strip()[:100]
+            break
+    
+    # Habilidades
+    if content_lower is None:
+        content_lower = content.lower()
+    if "habilidades" in content_lower or "skills" in content_lower:
+        skills_text = first_match(CV_SKILLS_RE, content, candidates)
+        if skills_text is not None:
+            # Extraer habilidades comunes
+            tech_skills = ["python", "java", "javascript", "sql", "excel", "powerbi", "tableau", 
+                          "aws", "azure", "docker", "kubernetes", "git", "agile", "scrum"]
+            found_skills = []
+            for skill in tech_skills:
+                if skill in skills_text.lower():
+                    found_skills.append(skill.upper())
+            data["habilidades"] = found_skills[:10]  # Limitar a 10 habilidades
+    
+    # Idiomas
+    idiomas_found = []
+    for pattern in CV_IDIOMAS_PATTERNS:
+        if may_match(pattern, candidates):
+            idiomas_found.extend(pattern.findall(content))
+    data["idiomas"] = idiomas_found[:5]  # Limitar a 5 idiomas
+    
+    return data
+
+# Patrones de extracción de contratos
+CONTRACT_PARTES_RE = re.compile(r'(?:entre|between|partes|parties)[\s:]*([^\n,]+)(?:\s*y\s*|\s*and\s*)([^\n,]+)', re.IGNORECASE)
+CONTRACT_FECHA_RE = re.compile(r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{4})\b')
+CONTRACT_DURACION_RE = re.compile(r'(\d+)\s*(?:meses|months|años|years)', re.IGNORECASE)
+CONTRACT_VALOR_RE = re.compile(r'[€$£]\s*[\d.,]+(?:\.\d{2})?')
+CONTRACT_CLAUSULA_RE = re.compile(r'(?:cláusula|clause)\s*\d+[\s:]*([^\n]+)', re.IGNORECASE)
+
+def extract_contract_data(content, content_lower=None):
+    """Extraer datos específicos de contratos (content_lower: content.lower() si ya se tiene)"""
+    data = {
+        "tipo_contrato": "-",
+        "partes": [],
+        "fecha_inicio": "-",
+        "fecha_fin": "-",
+        "duracion": "-",
+        "valor": "-",
+        "clausulas_principales": []
+    }
+    
+    # Patrones que pueden aparecer en el documento (una pasada de Hyperscan)
+    candidates = candidate_patterns(content)
+    
+    # Tipo de contrato
+    if content_lower is None:
+        content_lower = content.lower()
+    tipos = ["laboral", "servicios", "arrendamiento", "compraventa", "confidencialidad", "prestación"]
+    for tipo in tipos:
+        if tipo in content_lower:
+            data["tipo_contrato"] = tipo.capitalize()
+            break
+    
+    # Partes del contrato
+    partes = first_match(CONTRACT_PARTES_RE, content, candidates)
+    if partes is not None:
+        data["partes"] = list(partes)
+    
+    # Fechas
+    fechas = []
+    if may_match(CONTRACT_FECHA_RE, candidates):
+        fechas = [m.group(1) for m in islice(CONTRACT_FECHA_RE.finditer(content), 2)]
+    if len(fechas) >= 1:
+        data["fecha_inicio"] = fechas[0]
+    if len(fechas) >= 2:
+        data["fecha_fin"] = fechas[1]
+    
+    # Duración
+    duracion = first_match(CONTRACT_DURACION_RE, content, candidates)
+    if duracion is not None:
+        data["duracion"] = duracion
+    
+    # Valor del contrato
+    valor = first_match(CONTRACT_VALOR_RE, content, candidates)
+    if valor is not None:
+        data["valor"] = valor
+    
+    # Cláusulas principales
+    if may_match(CONTRACT_CLAUSULA_RE, candidates):
+        clausulas = [m.group(1) for m in islice(CONTRACT_CLAUSULA_RE.finditer(content), 5)]
+        data["clausulas_principales"] = clausulas  # Primeras 5 cláusulas
+    
+    return data
+
+# Todos los patrones de los extractores (salvo el de nombre, que se aplica por línea)
+PREFILTER_PATTERNS = (
+    *(pattern for pattern_list in INVOICE_PATTERNS.values() for pattern in pattern_list),
+    CV_EMAIL_RE, CV_PHONE_RE, CV_LINKEDIN_RE, CV_EXPERIENCE_RE,
+    *CV_CARGO_PATTERNS, *CV_EDU_PATTERNS, CV_SKILLS_RE, *CV_IDIOMAS_PATTERNS,
+    CONTRACT_PARTES_RE, CONTRACT_FECHA_RE, CONTRACT_DURACION_RE,
+    CONTRACT_VALOR_RE, CONTRACT_CLAUSULA_RE
+)
+
+def build_prefilter_database(patterns):
+    """Base de datos Hyperscan con todos los patrones (None sin hyperscan)
+    
+    HS_FLAG_PREFILTER admite cualquier patrón aproximándolo por exceso: puede
+    dar falsos positivos pero nunca descarta un patrón que `re` encontraría.
+    """
+    if hyperscan is None:
+        return None
+    
+    flags = []
+    for pattern in patterns:
+        flag = (hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+                | hyperscan.HS_FLAG_PREFILTER | hyperscan.HS_FLAG_SINGLEMATCH)
+        if pattern.flags & re.IGNORECASE:
+            flag |= hyperscan.HS_FLAG_CASELESS
+        if pattern.flags & re.MULTILINE:
+            flag |= hyperscan.HS_FLAG_MULTILINE
+        flags.append(flag)
+    
+    database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    try:
+        database.compile(
+            expressions=[pattern.pattern.encode("utf-8") for pattern in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=flags
+        )
+    except hyperscan.error:
+        return None
+    return database
+
+PREFILTER_DATABASE = build_prefilter_database(PREFILTER_PATTERNS)
+
+def candidate_patterns(content):
+    """Patrones que pueden coincidir en el documento (None si no hay prefiltro)"""
+    if PREFILTER_DATABASE is None:
+        return None
+    
+    try:
+        data = content.encode("utf-8")
+    except UnicodeEncodeError:
+        # Surrogates sueltos: sin prefiltro, cada patrón se evalúa con `re`
+        return None
+    
+    found = set()
+    
+    def on_match(pattern_id, start, end, flags, context):
+        found.add(PREFILTER_PATTERNS[pattern_id])
+    
+    PREFILTER_DATABASE.scan(data, match_event_handler=on_match)
+    return found
+
+# ================== PROCESAMIENTO COMPLETO ==================
+
+def process_one(filename, data, mime_type="", size=None):
+    """Extraer, clasificar y extraer datos de un documento (ejecutable en otro proceso)
+    
+    Devuelve None si el documento no tiene texto y {"archivo", "error"} si no
+    se pudo leer.
+    """
+    try:
+        content = read_document_text(filename, data, mime_type)
+    except Exception as e:
+        return {"archivo": filename, "error": str(e)}
+    
+    if not content:
+        return None
+    
+    # Minúsculas una sola vez para clasificación y extracción
+    content_lower = content.lower()
+    doc_type, confidence = classify_document(content, filename, content_lower)
+    
+    result = {
+        "archivo": filename,
+        "tipo": doc_type,
+        "confianza": f"{confidence:.0f}%",
+        "palabras": len(content.split()),
+        "tamaño": len(data) if size is None else size
+    }
+    
+    # Extraer datos específicos según tipo
+    if doc_type == "Factura":
+        result.update(extract_invoice_data(content))
+    elif doc_type == "CV/Curriculum":
+        result.update(extract_cv_data(content, content_lower))
+    elif doc_type == "Contrato":
+        result.update(extract_contract_data(content, content_lower))
+    
+    return result
@@ -4,10 +4,14 @@ Soporta OpenAI, Ollama y modelos locales
 """
 import asyncio
 import json
+import os
 from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
 from loguru import logger
 
+# Peticiones simultáneas al proveedor dentro de un mismo lote de prompts
+AI_BATCH_CONCURRENCY = int(os.environ.get("AI_BATCH_CONCURRENCY", 8))
+
 class AIService:
     """
     🤖 Servicio centralizado de IA
@@ -66,6 +70,32 @@ class AIService:
             logger.error(f"❌ Error generando texto: {str(e)}")
             raise AIServiceError(f"Error en generación de texto: {str(e)}")
     
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        max_concurrency: int = AI_BATCH_CONCURRENCY,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> List[Union[str, Exception]]:
+        """
+        Generar texto para varios prompts en una sola llamada
+        
+        Los prompts se multiplexan con concurrencia acotada (ningún proveedor
+        soportado acepta todavía listas de prompts). Las respuestas se devuelven
+        en el mismo orden; con return_exceptions=True los errores se devuelven
+        en su posición en lugar de propagarse.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def generate_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.generate_text(prompt, **kwargs)
+        
+        return await asyncio.gather(
+            *[generate_one(prompt) for prompt in prompts],
+            return_exceptions=return_exceptions
+        )
+    
     async def _generate_mock(self, prompt: str) -> str:
         """Generar respuesta mock para desarrollo sin IA real"""
         await asyncio.sleep(0.5)  # Simular latencia
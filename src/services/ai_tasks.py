@@ -0,0 +1,178 @@
+"""
+📨 AI Tasks - Generación de texto asíncrona por task_id
+Las peticiones se encolan y se responden de inmediato con un task_id; un pool
+de workers las resuelve con AIService.generate_batch y guarda el resultado
+durante un tiempo limitado para que el cliente lo consulte
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from .ai_service import AIService, ai_service
+
+# Workers concurrentes, prompts ya encolados que toma cada worker de una vez,
+# vida de los resultados y máximo de resultados guardados
+AI_TASK_WORKERS = int(os.environ.get("AI_TASK_WORKERS", 8))
+AI_TASK_BATCH_SIZE = int(os.environ.get("AI_TASK_BATCH_SIZE", 16))
+AI_RESULT_TTL = float(os.environ.get("AI_RESULT_TTL", 600))  # segundos
+AI_RESULT_MAX = int(os.environ.get("AI_RESULT_MAX", 10000))
+
+class PromptTaskQueue:
+    """
+    📨 Cola de generaciones con resultados consultables
+    
+    Cada entrada pasa por pending -> running -> completed/failed. Cada worker
+    toma el siguiente prompt junto con los que ya esperan en la cola (hasta
+    batch_size, sin esperar a que lleguen más) y los envía con generate_batch.
+    Los resultados caducan a los result_ttl segundos de crearse y, si se
+    supera max_results, se descartan primero los más antiguos.
+    """
+    
+    def __init__(
+        self,
+        service: AIService,
+        workers: int = AI_TASK_WORKERS,
+        batch_size: int = AI_TASK_BATCH_SIZE,
+        result_ttl: float = AI_RESULT_TTL,
+        max_results: int = AI_RESULT_MAX
+    ):
+        self.service = service
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.result_ttl = result_ttl
+        self.max_results = max(1, max_results)
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # task_id -> (expira_en, entrada), en orden de creación
+        self._results: "OrderedDict[str, Any]" = OrderedDict()
+    
+    def start(self) -> None:
+        """Arrancar el pool de workers en el event loop actual"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.workers)
+        ]
+    
+    async def close(self) -> None:
+        """Detener los workers; las tareas sin terminar quedan como fallidas"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        
+        for _, entry in self._results.values():
+            if entry["status"] in ("pending", "running"):
+                entry["status"] = "failed"
+                entry["error"] = "Servicio detenido"
+    
+    async def submit(self, prompt: str, **params) -> str:
+        """Encolar una generación y devolver su task_id"""
+        if not self._workers:
+            self.start()
+        
+        task_id = str(uuid.uuid4())
+        self._evict()
+        self._results[task_id] = (time.monotonic() + self.result_ttl, {
+            "task_id": task_id,
+            "status": "pending",
+            "created_at": datetime.now().isoformat(),
+            "metadata": {
+                "prompt_length": len(prompt),
+                "model": params.get("model") or "default",
+                "provider": self.service.provider
+            }
+        })
+        
+        await self._queue.put((task_id, prompt, params))
+        return task_id
+    
+    def get_result(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Estado y resultado de una generación (None si no existe o caducó)"""
+        item = self._results.get(task_id)
+        if item is None:
+            return None
+        
+        expires_at, entry = item
+        if expires_at <= time.monotonic():
+            del self._results[task_id]
+            return None
+        return entry
+    
+    async def _worker(self) -> None:
+        """Resolver el siguiente prompt y los que ya esperan en la cola"""
+        while True:
+            items = [await self._queue.get()]
+            while len(items) < self.batch_size and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            
+            # Una llamada a generate_batch por grupo de parámetros de generación
+            groups: Dict[Tuple, List[Tuple[Dict[str, Any], str]]] = {}
+            for task_id, prompt, params in items:
+                item = self._results.get(task_id)
+                if item is None:
+                    continue
+                entry = item[1]
+                entry["status"] = "running"
+                groups.setdefault(tuple(sorted(params.items())), []).append((entry, prompt))
+            
+            await asyncio.gather(*[
+                self._generate(dict(key), group) for key, group in groups.items()
+            ])
+    
+    async def _generate(self, params: Dict[str, Any], group: List[Tuple[Dict[str, Any], str]]) -> None:
+        """Generar las respuestas de un grupo y guardarlas en sus entradas"""
+        try:
+            responses = await self.service.generate_batch(
+                [prompt for _, prompt in group], return_exceptions=True, **params
+            )
+        except asyncio.CancelledError:
+            for entry, _ in group:
+                entry["status"] = "failed"
+                entry["error"] = "Servicio detenido"
+                entry["completed_at"] = datetime.now().isoformat()
+            raise
+        
+        for (entry, _), response in zip(group, responses):
+            if isinstance(response, BaseException):
+                logger.error(f"❌ Error en generación {entry['task_id']}: {response}")
+                entry["error"] = str(response)
+                entry["status"] = "failed"
+            else:
+                entry["response"] = response
+                entry["metadata"]["response_length"] = len(response)
+                entry["status"] = "completed"
+            entry["completed_at"] = datetime.now().isoformat()
+    
+    def _evict(self) -> None:
+        """Descartar resultados caducados y los más antiguos por encima del límite"""
+        now = time.monotonic()
+        while self._results:
+            task_id, (expires_at, _) = next(iter(self._results.items()))
+            if expires_at > now and len(self._results) < self.max_results:
+                break
+            del self._results[task_id]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtener estadísticas de la cola"""
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "stored_results": len(self._results)
+        }
+
+# 🌟 Instancia global de la cola de generaciones
+prompt_tasks = PromptTaskQueue(ai_service)
+
+# 🚀 Exportar elementos principales
+__all__ = [
+    "PromptTaskQueue",
+    "prompt_tasks"
+]
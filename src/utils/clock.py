@@ -0,0 +1,30 @@
+"""
+🕐 Clock - Marca de tiempo ISO cacheada con resolución de un segundo
+Los endpoints leen la cadena ya formateada en lugar de llamar a
+datetime.now().isoformat() en cada respuesta
+"""
+import asyncio
+from datetime import datetime
+
+# Última marca de tiempo formateada (la refresca run_clock)
+_CURRENT_ISO = ""
+
+def _format_now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+def iso_now() -> str:
+    """Marca de tiempo actual (precisión de segundos)"""
+    # Sin reloj en marcha (scripts, tests) se calcula en el momento
+    return _CURRENT_ISO or _format_now()
+
+async def run_clock() -> None:
+    """Refrescar la marca de tiempo cada segundo (tarea de fondo del lifespan)"""
+    global _CURRENT_ISO
+    
+    try:
+        while True:
+            _CURRENT_ISO = _format_now()
+            await asyncio.sleep(1)
+    finally:
+        # Al detenerse, volver al cálculo en el momento
+        _CURRENT_ISO = ""